@@ -0,0 +1,80 @@
+"""Cold vs. warm query latency for the columnar CSV sidecar.
+
+Cold: the CSV has no sidecar and is parsed as text (which also builds the
+sidecar). Warm: a fresh session loads the memory-mapped sidecar instead.
+Every run uses a new DataFrameCache so the in-memory cache never hides the
+load cost. Latency covers loading the frame and evaluating the query, not
+serializing the tool result.
+
+    python benchmarks/bench_csv_sidecar.py --rows 1000000 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_tool_use import CsvSidecar, DataFrameCache, GroqDeepseek, MockGroq
+
+
+def write_csv(path: str, rows: int):
+    with open(path, "w") as file:
+        file.write("id,city,age,score\n")
+        cities = ["Austin", "Boston", "Chicago", "Denver", "Miami"]
+        for i in range(rows):
+            file.write(f"{i},{cities[i % 5]},{18 + i % 60},{(i * 7919) % 1000 / 10}\n")
+
+
+def time_query(path: str, query: str, sidecar: CsvSidecar) -> float:
+    chat = GroqDeepseek(client=MockGroq([{}]), csv_sidecar=sidecar,
+                        csv_cache=DataFrameCache(loader=sidecar.load))
+    start = time.perf_counter()
+    chat._load_frame(path).query(query)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--query", default="age > 70 and city == 'Boston'")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    sidecar = CsvSidecar(min_bytes=0)
+    if not sidecar.enabled:
+        sys.exit("pyarrow is not installed; the sidecar cache is disabled")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.csv")
+        write_csv(path, args.rows)
+        file_bytes = os.path.getsize(path)
+
+        cold, warm = [], []
+        for _ in range(args.runs):
+            sidecar.invalidate(path)
+            cold.append(time_query(path, args.query, sidecar))
+            warm.append(time_query(path, args.query, sidecar))
+
+    results = {
+        "rows": args.rows,
+        "file_bytes": file_bytes,
+        "cold_median_ms": statistics.median(cold) * 1000,
+        "warm_median_ms": statistics.median(warm) * 1000,
+    }
+    results["speedup"] = results["cold_median_ms"] / results["warm_median_ms"]
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{args.rows:,} rows, query {args.query!r}")
+        print(f"  cold (CSV parse + sidecar build): {results['cold_median_ms']:8.1f} ms")
+        print(f"  warm (memory-mapped sidecar):     {results['warm_median_ms']:8.1f} ms")
+        print(f"  speedup: {results['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
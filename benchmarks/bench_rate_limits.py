@@ -0,0 +1,70 @@
+"""Concurrent sessions against a throttling fake server, with and without the client-side limiter.
+
+The fake server enforces a requests-per-minute token bucket and answers
+excess requests with 429 + Retry-After. Without a RateLimiter, sessions
+burst into the limit and depend on retries; with one sized to the same
+limit they queue on the client instead. Reports completed sessions, 429s
+seen by the server and sessions per minute.
+
+    python benchmarks/bench_rate_limits.py --sessions 650 --rpm 600
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_tool_use import AsyncGroqDeepseek, RateLimiter, RetryPolicy, groq_client
+from fake_groq_server import FakeCompletionServer
+
+
+async def run(sessions: int, rpm: int, latency: float, limiter: RateLimiter, max_retries: int) -> dict:
+    with FakeCompletionServer(requests_per_minute=rpm, latency=latency) as server:
+        chat = AsyncGroqDeepseek(
+            client=groq_client(async_client=True, base_url=server.base_url, api_key="fake"),
+            rate_limiter=limiter,
+            retry_policy=RetryPolicy(max_retries=max_retries),
+            max_concurrent_requests=64,
+        )
+        start = time.perf_counter()
+        replies = await asyncio.gather(*(chat.chat(chat.new_session(), "hello") for _ in range(sessions)))
+        elapsed = time.perf_counter() - start
+        chat.close()
+        completed = sum(reply.startswith("Echo") for reply in replies)
+        return {
+            "completed": completed,
+            "failed": sessions - completed,
+            "throttled": server.rejected.count(429),
+            "seconds": elapsed,
+            "sessions_per_minute": completed / elapsed * 60,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=650)
+    parser.add_argument("--rpm", type=int, default=600, help="server limit, also used for the client limiter")
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--retries", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {
+        "retries_only": asyncio.run(run(args.sessions, args.rpm, args.latency, RateLimiter(), args.retries)),
+        "rate_limited": asyncio.run(run(args.sessions, args.rpm, args.latency,
+                                        RateLimiter(requests_per_minute=args.rpm), args.retries)),
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{args.sessions} sessions against a {args.rpm} RPM server")
+        for label, result in results.items():
+            print(f"  {label:<13} completed {result['completed']:>5}  failed {result['failed']:>4}  "
+                  f"429s {result['throttled']:>5}  {result['sessions_per_minute']:>8.0f} sessions/min")
+
+
+if __name__ == "__main__":
+    main()
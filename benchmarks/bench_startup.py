@@ -0,0 +1,112 @@
+"""Startup time of the package and the CLI, each measured in a fresh interpreter.
+
+Every case runs in a new `python` process, so nothing is already imported.
+The time reported is the process wall time minus a bare `python -c pass`,
+i.e. what this package adds to startup. Cases that must not load the heavy
+dependencies (pandas, numpy, groq, rich.markdown) also fail when they do.
+Exits non-zero when a case's median exceeds `--target-ms`.
+
+    python benchmarks/bench_startup.py --runs 10 --target-ms 200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "numpy", "pyarrow", "groq", "httpx", "rich.markdown")
+
+# name -> (python code or CLI arguments, modules that must stay unloaded)
+CASES = {
+    "startup.import_package": (["-c", "import groq_tool_use"], HEAVY),
+    "startup.import_agent": (["-c", "from groq_tool_use import GroqDeepseek"], HEAVY),
+    "startup.read_file_session": (["-c", """
+import sys
+from groq_tool_use import GroqDeepseek, MockGroq, NullRenderer
+chat = GroqDeepseek(client=MockGroq([{}]), renderer=NullRenderer())
+assert '"error"' not in chat.execute_tool("read_file", {"file_path": sys.argv[1]})
+chat.close()
+""", "{data}"], HEAVY),
+    "startup.cli_help": (["-c", """
+import contextlib, io, runpy, sys
+sys.argv = ["Groq_Tool_Use.py", "--help"]
+with contextlib.redirect_stdout(io.StringIO()), contextlib.suppress(SystemExit):
+    runpy.run_path("Groq_Tool_Use.py", run_name="__main__")
+"""], HEAVY),
+}
+
+CHECK = """
+import sys
+loaded = [name for name in {heavy!r} if name in sys.modules]
+if loaded:
+    sys.exit("loaded " + ", ".join(loaded))
+"""
+
+
+def run_once(arguments: list, heavy: tuple = ()) -> float:
+    """Wall time in ms of one fresh interpreter running `arguments`"""
+    if heavy and arguments[0] == "-c":
+        arguments = ["-c", arguments[1] + CHECK.format(heavy=heavy)] + arguments[2:]
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable] + arguments, cwd=ROOT, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)[:60]!r} failed: {process.stderr.strip()[-500:]}")
+    return elapsed
+
+
+def measure(runs: int = 10) -> list:
+    """One record per case: median/p95/min added startup in ms over `runs` processes"""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+        file.write("hello\n" * 100)
+    try:
+        # Warm the OS file cache and bytecode caches before timing anything
+        for arguments, heavy in CASES.values():
+            run_once([argument.replace("{data}", file.name) for argument in arguments], heavy)
+        baseline = statistics.median(run_once(["-c", "pass"]) for _ in range(runs))
+        results = []
+        for name, (arguments, heavy) in CASES.items():
+            arguments = [argument.replace("{data}", file.name) for argument in arguments]
+            samples = sorted(max(run_once(arguments, heavy) - baseline, 0.0) for _ in range(runs))
+            results.append({
+                "name": name,
+                "unit": "ms",
+                "runs": runs,
+                "median": statistics.median(samples),
+                "p95": samples[min(runs - 1, int(round(0.95 * (runs - 1))))],
+                "min": samples[0],
+                "extra": {"interpreter_ms": baseline},
+            })
+        return results
+    finally:
+        os.remove(file.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=200.0,
+                        help="fail when a case's median added startup exceeds this")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    over = [record["name"] for record in results if record["median"] > args.target_ms]
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"added startup over a bare interpreter ({results[0]['extra']['interpreter_ms']:.0f} ms), "
+              f"target {args.target_ms:.0f} ms")
+        for record in results:
+            print(f"  {record['name']:<28} median {record['median']:>7.1f} ms  p95 {record['p95']:>7.1f} ms"
+                  f"{'  OVER TARGET' if record['name'] in over else ''}")
+    if over:
+        sys.exit(f"{len(over)} case(s) over the {args.target_ms:.0f} ms target: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""Offline benchmark suite for GroqDeepseek.
+
+Needs no API key or network: completions are replayed by MockGroq from a
+recorded session (benchmarks/recordings/), tool calls and <think> content
+included, with optional per-request latency. Suites:
+
+    turn     end-to-end chat turns, streaming and non-streaming
+    csv      each CSV tool on generated files (--rows, e.g. 1000,100000,1000000,10000000)
+    files    read_file line ranges, tail and pattern search on a large log (--log-mb)
+    history  turn latency and prompt size as one conversation grows
+    render   console rendering of streamed tokens, tool lines and the final answer
+    startup  import and CLI startup in fresh interpreters (see bench_startup.py)
+
+Results are written as JSON with one record per benchmark (median/p95/min
+in `unit`). `--compare` checks them against an earlier results file and
+exits non-zero when a median got worse by more than `--threshold`.
+
+    python benchmarks/run_benchmarks.py --output base.json
+    python benchmarks/run_benchmarks.py --compare base.json --output head.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+
+from groq_tool_use import render
+from groq_tool_use import (ConsoleRenderer, CsvRowStore, CsvSidecar, DataFrameCache, FileReader, GroqDeepseek,
+                           HistoryPolicy, MockGroq, NullRenderer, Tracer, extract_think_content)
+from bench_csv_sidecar import write_csv
+from bench_startup import measure as measure_startup
+
+RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings", "csv_analysis.json")
+PROMPT = "Summarize people.csv: who is over 70 in Boston and how do scores compare by city?"
+
+
+def summarize(name: str, samples: list, unit: str = "ms", **extra) -> dict:
+    ordered = sorted(samples)
+    record = {
+        "name": name,
+        "unit": unit,
+        "runs": len(samples),
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "min": ordered[0],
+    }
+    if extra:
+        record["extra"] = extra
+    return record
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def new_chat(client, stream: bool = False, **kwargs) -> GroqDeepseek:
+    return GroqDeepseek(client=client, renderer=NullRenderer(), stream=stream, **kwargs)
+
+
+def bench_turn(args, directory: str) -> list:
+    """Whole chat turns (three completions, three tool calls) against the recording"""
+    path = os.path.join(directory, "turn.csv")
+    write_csv(path, 10_000)
+    results = []
+    for stream in (False, True):
+        # Share the parsed frame across sessions, as one long-lived process would
+        sidecar = CsvSidecar()
+        shared = dict(csv_sidecar=sidecar, csv_cache=DataFrameCache(loader=sidecar.load), csv_rows=CsvRowStore())
+        tracer = Tracer()
+        samples = []
+        for run in range(args.runs + 1):
+            client = MockGroq.from_file(RECORDING, latency=args.latency, file_path=path)
+            chat = new_chat(client, stream=stream, tracer=tracer, **shared)
+            elapsed = timed(lambda: chat.chat(PROMPT))
+            chat.close()
+            if run:  # the first turn parses the CSV
+                samples.append(elapsed)
+        spans = tracer.stats()["spans"]
+        results.append(summarize(
+            f"turn.{'stream' if stream else 'blocking'}", samples,
+            api_call_p50_ms=spans["api_call"]["p50_ms"],
+            tool_p50_ms=spans["tool"]["p50_ms"],
+            serialize_p50_ms=spans["serialize"]["p50_ms"],
+        ))
+    return results
+
+
+def csv_cases(path: str, rows: int, runs: int) -> list:
+    """(name, tool, args factory) for each tool; factories get the run number.
+
+    Appends run last so the other cases see exactly `rows` rows; appended rows
+    also fill the columns added by `add_columns_csv`.
+    """
+    return [
+        ("read_csv", "read_csv", lambda run: {"file_path": path}),
+        ("read_rows", "read_rows", lambda run: {"file_path": path, "offset": rows // 2, "limit": 100}),
+        ("query_csv.filter", "query_csv",
+         lambda run: {"file_path": path, "query": "age > 70 and city == 'Boston'", "columns": ["id", "score"]}),
+        ("query_csv.aggregate", "query_csv",
+         lambda run: {"file_path": path, "aggregate": {"score": "mean", "id": "count"}, "group_by": "city"}),
+        ("query_csv.chunked", "query_csv",
+         lambda run: {"file_path": path, "aggregate": {"score": "mean"}, "group_by": "city", "stream": True}),
+        ("update_csv", "update_csv",
+         lambda run: {"file_path": path, "row_index": (run * 7919) % rows, "column_name": "city",
+                      "new_value": f"Town{run}"}),
+        ("update_cells.100", "update_cells",
+         lambda run: {"file_path": path, "updates": [
+             {"row_index": (run * 100 + i) * 31 % rows, "column_name": "score", "new_value": "1.5"}
+             for i in range(100)]}),
+        ("add_columns_csv", "add_columns_csv",
+         lambda run: {"file_path": path, "new_columns": {f"extra_{run}": ["x"] * rows}}),
+        ("append_csv.100", "append_csv",
+         lambda run: {"file_path": path,
+                      "data": [[str(rows + i), "Austin", "30", "1.0"] + ["x"] * runs for i in range(100)]}),
+    ]
+
+
+def bench_csv(args, directory: str) -> list:
+    """Each CSV tool through execute_tool (validation, dispatch, shaping) per file size"""
+    results = []
+    for rows in args.rows:
+        path = os.path.join(directory, f"rows_{rows}.csv")
+        write_csv(path, rows)
+        chat = new_chat(MockGroq([{}]))
+        cold = []
+        for _ in range(args.runs):
+            chat.csv_cache.invalidate(path)
+            chat.csv_sidecar.invalidate(path)
+            cold.append(timed(lambda: chat._load_frame(path)))
+        results.append(summarize(f"csv.load_cold.rows={rows}", cold, file_bytes=os.path.getsize(path)))
+        for name, tool, make_args in csv_cases(path, rows, args.runs):
+            samples = []
+            for run in range(args.runs):
+                tool_args = make_args(run)
+                if tool == "add_columns_csv":
+                    # Measure the streamed rewrite, taken when the frame is not cached
+                    chat.csv_cache.invalidate(path)
+
+                def call():
+                    content = chat.execute_tool(tool, tool_args)
+                    if content.startswith('{"error"'):
+                        raise RuntimeError(f"{tool} failed: {content}")
+                    # Count the write-behind flush and journal compaction as part of the write
+                    chat._sync_csv(path)
+                samples.append(timed(call))
+            results.append(summarize(f"csv.{name}.rows={rows}", samples))
+        chat.close()
+        os.remove(path)
+    return results
+
+
+def write_log(path: str, megabytes: int) -> int:
+    """A log of about `megabytes` MB with an ERROR line every 100,000 lines; returns the line count"""
+    lines = 0
+    with open(path, "w") as file:
+        while file.tell() < megabytes * 1024 * 1024:
+            file.write("".join(
+                f"2024-05-01T12:00:00 ERROR request {line} failed\n" if line % 100_000 == 0 else
+                f"2024-05-01T12:00:00 INFO worker-{line % 16} served request {line} in {line % 997} ms\n"
+                for line in range(lines, lines + 10_000)))
+            lines += 10_000
+    return lines
+
+
+def bench_files(args, directory: str) -> list:
+    """read_file on a large log: the line index cold and warm, tail, and a whole-file search"""
+    path = os.path.join(directory, "app.log")
+    lines = write_log(path, args.log_mb)
+    chat = new_chat(MockGroq([{}]))
+    middle = lines // 2
+
+    def read(**tool_args):
+        content = chat.execute_tool("read_file", dict(file_path=path, **tool_args))
+        if content.startswith('{"error"'):
+            raise RuntimeError(f"read_file failed: {content}")
+
+    def cold_range():
+        # A new reader has no line index, so the first range read builds it up to the line
+        chat.file_reader = FileReader()
+        read(start_line=middle, end_line=middle + 20)
+
+    cases = {
+        "files.read_default": lambda run: read(),
+        "files.lines.cold": lambda run: cold_range(),
+        "files.lines.warm": lambda run: read(start_line=middle + run * 1000, end_line=middle + run * 1000 + 20),
+        "files.tail": lambda run: read(tail=50),
+        "files.pattern.whole_file": lambda run: read(pattern="ERROR", max_matches=1000),
+    }
+    results = []
+    for name, case in cases.items():
+        samples = [timed(lambda: case(run)) for run in range(args.runs)]
+        results.append(summarize(name, samples, file_bytes=os.path.getsize(path)))
+    # Python allocations stay at one budget of text, however large the file
+    tracemalloc.start()
+    read(pattern="ERROR", max_matches=1000)
+    read(start_line=lines - 100)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results.append(summarize("files.peak_alloc", [peak / 1024], unit="KB", file_bytes=os.path.getsize(path)))
+    chat.close()
+    os.remove(path)
+    return results
+
+
+def bench_history(args, directory: str) -> list:
+    """Turn latency and prompt tokens over one long conversation, with and without compaction"""
+    path = os.path.join(directory, "history.csv")
+    write_csv(path, 10_000)
+    policies = {
+        "compacted": HistoryPolicy(),
+        "uncompacted": HistoryPolicy(max_prompt_tokens=10 ** 9, keep_recent_turns=10 ** 6,
+                                     strip_reasoning=False),
+    }
+    results = []
+    for label, policy in policies.items():
+        client = MockGroq.from_file(RECORDING, latency=args.latency, repeat=args.turns, file_path=path)
+        chat = new_chat(client, history_policy=policy)
+        turns = [timed(lambda: chat.chat(PROMPT)) for _ in range(args.turns)]
+        chat.close()
+        prompts = [size["tokens"] for size in chat.conversation_history.prompt_sizes]
+        results.append(summarize(f"history.{label}.turn", turns[1:],
+                                 first_turn_ms=turns[0], last_turn_ms=turns[-1]))
+        results.append(summarize(f"history.{label}.prompt_tokens", prompts, unit="tokens",
+                                 last=prompts[-1], max=max(prompts)))
+    return results
+
+
+def bench_render(args, directory: str) -> list:
+    """ConsoleRenderer output to an in-memory terminal"""
+    with open(RECORDING) as file:
+        responses = json.load(file)["responses"]
+    final = responses[-1]["content"]
+    thinking, answer = extract_think_content(final)
+    long_content = f"<think>{thinking * 20}</think>" + "\n\n".join([answer] * 20)
+    tool_line = {"name": "query_csv", "elapsed_ms": 12.3, "bytes": 4096, "tokens": 1024,
+                 "saved_bytes": 65536, "saved_tokens": 16384}
+
+    original = render.console
+    render.console = Console(file=io.StringIO(), force_terminal=True, width=120)
+    try:
+        renderer = ConsoleRenderer()
+
+        def stream(content: str = final, renderer: ConsoleRenderer = renderer):
+            renderer.begin_completion()
+            for start in range(0, len(content), 16):
+                renderer.token(content[start:start + 16])
+            renderer.end_completion()
+
+        def tool_lines():
+            for _ in range(10):
+                renderer.tool_result(tool_line)
+
+        cases = {
+            "render.stream_tokens": stream,
+            # 20x the reasoning and answer, refreshing on every token: the cost per
+            # token should stay flat instead of growing with the text on screen
+            "render.stream_tokens.long": lambda: stream(long_content, ConsoleRenderer(refresh_per_second=1e9)),
+            "render.tool_results.10": tool_lines,
+            "render.final_markdown": lambda: renderer.response(thinking, answer),
+        }
+        results = []
+        for name, function in cases.items():
+            samples = []
+            for _ in range(args.runs):
+                render.console.file = io.StringIO()
+                samples.append(timed(function))
+            results.append(summarize(name, samples))
+        return results
+    finally:
+        render.console = original
+
+
+def bench_startup(args, directory: str) -> list:
+    """Added startup time of the package, a read_file-only session and the CLI"""
+    return measure_startup(max(args.runs, 5))
+
+
+SUITES = {"turn": bench_turn, "csv": bench_csv, "files": bench_files, "history": bench_history, "render": bench_render,
+          "startup": bench_startup}
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+    }
+
+
+def compare(results: list, baseline_path: str, threshold: float, min_delta: float) -> list:
+    """Print current vs. baseline medians; return the names that regressed"""
+    with open(baseline_path) as file:
+        baseline = {record["name"]: record for record in json.load(file)["results"]}
+    regressions = []
+    print(f"{'benchmark':<44} {'unit':<6} {'baseline':>10} {'current':>10} {'change':>8}")
+    for record in results:
+        before = baseline.get(record["name"])
+        if before is None or before["unit"] != record["unit"]:
+            continue
+        change = record["median"] / before["median"] - 1 if before["median"] else 0.0
+        regressed = change > threshold and record["median"] - before["median"] > min_delta
+        if regressed:
+            regressions.append(record["name"])
+        print(f"{record['name']:<44} {record['unit']:<6} {before['median']:>10.2f} {record['median']:>10.2f} "
+              f"{change:>+8.0%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma-separated subset of " + ", ".join(SUITES))
+    parser.add_argument("--rows", default="1000,100000,1000000",
+                        help="comma-separated CSV sizes for the csv suite (add 10000000 for the full sweep)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--log-mb", type=int, default=256, help="log size in MB for the files suite")
+    parser.add_argument("--turns", type=int, default=20, help="conversation length for the history suite")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of simulated latency per completion")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="results file from an earlier commit to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown of a median")
+    parser.add_argument("--min-delta", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this (in the benchmark's unit)")
+    args = parser.parse_args()
+    args.rows = [int(rows) for rows in args.rows.split(",")]
+    suites = args.suites.split(",")
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for suite in suites:
+            for record in SUITES[suite](args, directory):
+                results.append(record)
+                print(f"{record['name']:<44} median {record['median']:>10.2f} {record['unit']:<6} "
+                      f"p95 {record['p95']:>10.2f}", file=sys.stderr)
+
+    report = {"meta": metadata(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    elif not args.compare:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold, args.min_delta)
+        if regressions:
+            sys.exit(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""In-process fake of the Groq chat completions endpoint.
+
+Serves `POST /openai/v1/chat/completions` on localhost so the real `Groq` and
+`AsyncGroq` clients can be pointed at it (via `base_url`) for offline tests and
+load benchmarks. Responses use the same scripted format as `MockGroq`: a dict
+with optional "content" and "tool_calls" (a list of {"id", "name", "arguments"}).
+It can also throttle like the real API: fail scripted requests with 429/5xx
+responses, or enforce a requests-per-minute limit, both with `Retry-After`.
+"""
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load benchmarks open hundreds of connections at once
+    request_queue_size = 1024
+
+
+def echo_responder(request: dict) -> dict:
+    """Default responder: answer with the last user message"""
+    for message in reversed(request.get("messages", [])):
+        if message.get("role") == "user":
+            return {"content": f"<think>Echoing the user.</think>Echo: {message.get('content', '')}"}
+    return {"content": "Echo"}
+
+
+class FakeCompletionServer:
+    """Threaded HTTP server that answers chat completion requests from a script.
+
+    Either pass `responses` (consumed in order, the last one repeats) or a
+    `responder` callable that maps the decoded request body to a response.
+    `latency` is slept before every response; streamed responses are split
+    into `chunk_size` character deltas.
+
+    `failures` lists HTTP status codes returned, in order, for the first
+    requests (e.g. `[429, 503]`) with a `Retry-After` of `retry_after`
+    seconds. `requests_per_minute` enforces a token bucket of that size,
+    refilled continuously, and rejects requests over it with a 429 whose
+    `Retry-After` is the time until the next request is allowed. Rejected
+    statuses are recorded in `rejected`. The first `broken_streams` streamed
+    responses are cut off after their first chunk, like a dropped connection.
+    """
+
+    def __init__(self, responses: List[dict] = None, responder: Callable[[dict], dict] = None,
+                 latency: float = 0.0, chunk_size: int = 16, host: str = "127.0.0.1", port: int = 0,
+                 failures: List[int] = None, requests_per_minute: int = None, retry_after: float = 1.0,
+                 broken_streams: int = 0):
+        self.responses = list(responses or [])
+        self.responder = responder or (self._scripted if self.responses else echo_responder)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.failures = list(failures or [])
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.broken_streams = broken_streams
+        self.requests = []
+        self.rejected = []
+        self._bucket = float(requests_per_minute or 0)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _scripted(self, request: dict) -> dict:
+        with self._lock:
+            if len(self.responses) > 1:
+                return self.responses.pop(0)
+            return self.responses[0]
+
+    def _throttle(self):
+        """Return (status, retry_after) if this request should be rejected, else None"""
+        with self._lock:
+            if self.failures:
+                return self.failures.pop(0), self.retry_after
+            if self.requests_per_minute:
+                now = time.monotonic()
+                rate = self.requests_per_minute / 60
+                self._bucket = min(self.requests_per_minute, self._bucket + (now - self._refilled) * rate)
+                self._refilled = now
+                if self._bucket < 1:
+                    return 429, (1 - self._bucket) / rate
+                self._bucket -= 1
+            return None
+
+    def start(self) -> "FakeCompletionServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                throttled = server._throttle()
+                if throttled is not None:
+                    status, retry_after = throttled
+                    with server._lock:
+                        server.rejected.append(status)
+                    kind = "rate_limit_exceeded" if status == 429 else f"http_{status}"
+                    self._send_json(status, {"error": {"message": f"Fake {status}", "type": "requests", "code": kind}},
+                                    headers={"Retry-After": f"{retry_after:.3f}"})
+                    return
+                with server._lock:
+                    server.requests.append(request)
+                scripted = server.responder(request)
+                if server.latency:
+                    time.sleep(server.latency)
+                if request.get("stream"):
+                    self._send_stream(request, scripted)
+                else:
+                    self._send_json(200, server.completion_body(request, scripted))
+
+            def _send_json(self, status: int, body: dict, headers: dict = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_stream(self, request: dict, scripted: dict):
+                with server._lock:
+                    broken = server.broken_streams > 0
+                    server.broken_streams -= broken
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for chunk in server.stream_chunks(request, scripted):
+                    self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                    if broken:
+                        # Close without the final chunk, so the client sees an incomplete body
+                        return
+                self._send_chunk(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+            def _send_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    @staticmethod
+    def _usage(request: dict, content: str) -> dict:
+        prompt_tokens = len(json.dumps(request.get("messages", []))) // 4
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    @staticmethod
+    def _tool_calls(scripted: dict) -> List[dict]:
+        return [
+            {"id": call["id"], "type": "function",
+             "function": {"name": call["name"], "arguments": call["arguments"]}}
+            for call in scripted.get("tool_calls", [])
+        ]
+
+    def completion_body(self, request: dict, scripted: dict) -> dict:
+        content = scripted.get("content", "")
+        message = {"role": "assistant", "content": content}
+        tool_calls = self._tool_calls(scripted)
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": self._usage(request, content),
+        }
+
+    def stream_chunks(self, request: dict, scripted: dict):
+        content = scripted.get("content", "")
+        tool_calls = self._tool_calls(scripted)
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+        }
+        for start in range(0, len(content), self.chunk_size):
+            delta = {"content": content[start:start + self.chunk_size]}
+            if start == 0:
+                delta["role"] = "assistant"
+            yield dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}])
+        if tool_calls:
+            deltas = [dict(call, index=index) for index, call in enumerate(tool_calls)]
+            yield dict(base, choices=[{"index": 0, "delta": {"tool_calls": deltas}, "finish_reason": None}])
+        yield dict(base, choices=[{
+            "index": 0,
+            "delta": {},
+            "finish_reason": "tool_calls" if tool_calls else "stop",
+        }], x_groq={"id": base["id"], "usage": self._usage(request, content)})
@@ -0,0 +1,67 @@
+"""Chat with Deepseek on Groq using file and CSV tools.
+
+Names are resolved lazily (PEP 562): `from groq_tool_use import GroqDeepseek`
+loads the agent and its tools but not the REPL, the rich renderer, the groq
+SDK or pandas. Those are imported on first use of the code that needs them.
+"""
+import importlib
+
+_EXPORTS = {
+    "GroqDeepseek": "agent",
+    "AsyncGroqDeepseek": "agent",
+    "NullRenderer": "agent",
+    "ConsoleRenderer": "render",
+    "console": "render",
+    "ChatSession": "history",
+    "ConversationHistory": "history",
+    "HistoryPolicy": "history",
+    "ResponseCache": "cache",
+    "DataFrameCache": "csv_store",
+    "CsvRowIndex": "csv_store",
+    "CsvRowStore": "csv_store",
+    "CsvAppendBuffer": "csv_store",
+    "CsvSidecar": "csv_store",
+    "QueryAggregator": "csv_store",
+    "AGGREGATIONS": "csv_store",
+    "FileReader": "files",
+    "LineIndex": "files",
+    "ToolExecutor": "executor",
+    "ToolRegistry": "registry",
+    # The built-in tools are registered when agent is imported, so TOOLS is taken from there
+    "TOOLS": "agent",
+    "tool": "registry",
+    "json_schema": "registry",
+    "ResultShaper": "shaping",
+    "Span": "tracing",
+    "Tracer": "tracing",
+    "trace_span": "tracing",
+    "traced": "tracing",
+    "groq_client": "transport",
+    "RetryPolicy": "transport",
+    "RateLimiter": "transport",
+    "StreamAccumulator": "transport",
+    "MockGroq": "mock",
+    "env_options": "batch",
+    "completed_ids": "batch",
+    "read_prompts": "batch",
+    "run_batch": "batch",
+    "main": "cli",
+    "atomic_write": "util",
+    "dumps": "util",
+    "estimate_tokens": "util",
+    "extract_think_content": "util",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
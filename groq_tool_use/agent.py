@@ -0,0 +1,1040 @@
+"""The GroqDeepseek chat loop and its file and CSV tools"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from functools import partial
+from typing import List, Dict
+
+from .cache import ResponseCache
+from .csv_store import CsvAppendBuffer, CsvRowStore, CsvSidecar, DataFrameCache, QueryAggregator
+from .executor import ToolExecutor
+from .files import FileReader
+from .history import ChatSession, ConversationHistory, HistoryPolicy
+from .registry import TOOLS, tool
+from .shaping import ResultShaper
+from .tracing import Span, Tracer
+from .transport import RateLimiter, RetryPolicy, StreamAccumulator, groq_client
+from .util import LazyModule, atomic_write, dumps, estimate_tokens, extract_think_content
+
+pd = LazyModule("pandas")
+
+
+class NullRenderer:
+    """Renderer for headless sessions: discards all output.
+
+    It lives here rather than in `render` so headless use never imports rich;
+    `render.ConsoleRenderer` implements the same methods for the REPL.
+    """
+
+    def begin_completion(self):
+        pass
+
+    def token(self, text: str):
+        pass
+
+    def end_completion(self):
+        pass
+
+    def tool_result(self, result: dict):
+        pass
+
+    def response(self, thinking, response):
+        pass
+
+    def error(self, message: str):
+        pass
+
+    def stats(self, stats: dict):
+        pass
+
+
+class GroqDeepseek:
+    # query_csv limits: default and maximum rows returned, and streaming thresholds
+    QUERY_ROW_LIMIT = 100
+    QUERY_MAX_ROWS = 1000
+    QUERY_CHUNK_ROWS = 100_000
+    STREAM_QUERY_BYTES = 256 * 1024 * 1024
+    # read_file sends files up to this size whole (paged by character offset);
+    # larger ones are read by line range through the memory-mapped FileReader
+    READ_FILE_WHOLE_BYTES = 1024 * 1024
+
+    def __init__(self, max_tool_workers: int = 4, use_process_pool: bool = False,
+                 max_tool_rounds: int = 8, stream: bool = True, client=None, renderer=None,
+                 csv_cache: DataFrameCache = None, csv_rows: CsvRowStore = None,
+                 csv_sidecar: CsvSidecar = None, csv_appends: CsvAppendBuffer = None,
+                 result_token_budget: int = 2000, history_policy: HistoryPolicy = None,
+                 response_cache: ResponseCache = None, tool_names: List[str] = None,
+                 tracer: Tracer = None, retry_policy: RetryPolicy = None,
+                 rate_limiter: RateLimiter = None, file_reader: FileReader = None, lazy_writes: bool = False):
+        self._client = client
+        self._init_tool_state(csv_cache, csv_rows, csv_sidecar, csv_appends, file_reader, result_token_budget,
+                              lazy_writes)
+        if renderer is None:
+            # Imported here so library users who pass a renderer never load rich
+            from .render import ConsoleRenderer
+            renderer = ConsoleRenderer()
+        self.renderer = renderer
+        self.history_policy = history_policy or HistoryPolicy()
+        self.response_cache = response_cache
+        self.tool_names = tool_names
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.session = ChatSession(policy=self.history_policy)
+        self.conversation_history = self.session.history
+        self.model = "deepseek-r1-distill-llama-70b"
+        self.max_tool_rounds = max_tool_rounds
+        self.stream = stream
+        self.tool_executor = ToolExecutor(self.execute_tool, max_workers=max_tool_workers,
+                                          use_process_pool=use_process_pool,
+                                          raw_bytes=self.shaper.take_raw_bytes,
+                                          process_factory=partial(type(self).tool_worker, result_token_budget))
+
+    def _init_tool_state(self, csv_cache: DataFrameCache = None, csv_rows: CsvRowStore = None,
+                         csv_sidecar: CsvSidecar = None, csv_appends: CsvAppendBuffer = None,
+                         file_reader: FileReader = None, result_token_budget: int = 2000,
+                         lazy_writes: bool = False):
+        """Set up the file state and result shaping that the tools run against"""
+        self.csv_sidecar = csv_sidecar if csv_sidecar is not None else CsvSidecar()
+        if csv_cache is None:
+            # Lazy edits are written at the end of each turn, not on every write tool
+            csv_cache = DataFrameCache(lazy=lazy_writes, loader=self.csv_sidecar.load)
+        self.csv_cache = csv_cache
+        self.csv_rows = csv_rows if csv_rows is not None else CsvRowStore()
+        self.csv_appends = csv_appends if csv_appends is not None else CsvAppendBuffer()
+        self.file_reader = file_reader if file_reader is not None else FileReader()
+        self.shaper = ResultShaper(result_token_budget)
+        # One lock per absolute path, held by write tools; the executor only orders
+        # writes within one batch, and sessions sharing this instance run batches at once
+        self._write_locks = {}
+        self._write_locks_lock = threading.Lock()
+
+    @classmethod
+    def tool_worker(cls, result_token_budget: int = 2000) -> "GroqDeepseek":
+        """An instance that can only run tools, for process-pool workers: no client, renderer or executor"""
+        worker = cls.__new__(cls)
+        worker._init_tool_state(result_token_budget=result_token_budget)
+        worker.response_cache = None
+        return worker
+
+    @property
+    def client(self):
+        """The API client, built on first request so tool-only use never imports groq"""
+        if self._client is None:
+            self._client = self._default_client()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _default_client(self):
+        return groq_client()
+
+    def run_tools(self, calls: List[dict]) -> List[dict]:
+        """Run a batch of parsed tool calls through the executor"""
+        if self.tool_executor.use_process_pool:
+            # Worker processes read files directly, so pending edits must be on disk
+            self.csv_cache.flush()
+            self._flush_appends()
+            self.csv_rows.compact()
+        return self.tool_executor.run(calls)
+
+    def flush(self):
+        """Write back pending CSV edits and buffered appends"""
+        self.csv_cache.flush()
+        self._flush_appends()
+        self.csv_rows.compact()
+
+    def _flush_turn(self):
+        """Write a turn's pending edits and appends; the model was told they were made.
+
+        Runs in the turn's `finally`, so a failure is reported rather than
+        raised over the turn's reply.
+        """
+        try:
+            self.csv_cache.flush()
+            self._flush_appends()
+            self.csv_rows.compact()
+        except Exception as e:
+            self.renderer.error(f"Could not write pending CSV changes: {str(e)}")
+
+    def close(self):
+        """Write back pending CSV edits and appends and stop the tool workers"""
+        self.flush()
+        self.tool_executor.shutdown()
+        self.tracer.close()
+
+    def stats(self) -> dict:
+        """Latency percentiles and totals from the tracer, plus prompt sizes and cache hit rates"""
+        stats = self.tracer.stats()
+        stats["history"] = self.conversation_history.stats()
+        if self.response_cache is not None:
+            stats["cache"] = self.response_cache.stats()
+        return stats
+
+    def _sync_csv(self, file_path: str):
+        """Apply journaled row edits and buffered appends before the file is read directly"""
+        frame = self.csv_cache.peek(file_path)
+        if self.csv_rows.compact(file_path) and frame is not None:
+            # The cached frame already has the journaled edits
+            self.csv_cache.touch(file_path)
+        for path in self.csv_appends.paths(file_path):
+            sidecar_current = self.csv_sidecar.is_current(path)
+            previous_size = self.csv_appends.write(path)
+            if sidecar_current:
+                self.csv_sidecar.extend(path, previous_size)
+
+    def _flush_appends(self):
+        for path in self.csv_appends.paths():
+            self._sync_csv(path)
+
+    def _load_frame(self, file_path: str) -> pd.DataFrame:
+        self._sync_csv(file_path)
+        return self.csv_cache.get(file_path)
+
+    def _forget_csv(self, file_path: str):
+        """Drop cached state for a file that is about to be replaced"""
+        self.csv_cache.invalidate(file_path)
+        self.csv_rows.invalidate(file_path)
+        self.csv_sidecar.invalidate(file_path)
+        self.csv_appends.discard(file_path)
+        self.file_reader.invalidate(file_path)
+
+    def _update_cells(self, file_path: str, edits: List[tuple]):
+        """Apply (row, column_name, value) edits, rewriting only the affected rows"""
+        if self.csv_appends.paths(file_path):
+            # Buffered rows may be the ones being edited
+            self._sync_csv(file_path)
+        if self.csv_cache.is_dirty(file_path):
+            # Unflushed frame edits are newer than the file, so edit the frame
+            df = self.csv_cache.get(file_path)
+            for row_index, column_name, new_value in edits:
+                if row_index < 0 or row_index >= len(df):
+                    raise IndexError(f"Row index {row_index} out of bounds")
+                if column_name not in df.columns:
+                    raise KeyError(f"Column '{column_name}' not found")
+            for row_index, column_name, new_value in edits:
+                try:
+                    df.at[row_index, column_name] = new_value
+                except (TypeError, ValueError):
+                    # The text does not fit the column's dtype; keep the column as text, as in the file
+                    df[column_name] = df[column_name].astype(object)
+                    df.at[row_index, column_name] = new_value
+            self.csv_cache.mark_modified(file_path)
+            return
+
+        df = self.csv_cache.peek(file_path)
+        self.csv_rows.update_cells(file_path, edits)
+        if df is not None:
+            try:
+                for row_index, column_name, new_value in edits:
+                    df.at[row_index, column_name] = new_value
+                self.csv_cache.touch(file_path)
+            except Exception:
+                # The new text does not fit the column's dtype; reparse on next read
+                self.csv_cache.invalidate(file_path)
+        
+    @tool("read_file", "Read a text file: whole, a line or byte range, the last lines, or the lines "
+          "matching a regular expression. Large files are read in bounded ranges; a truncated "
+          "result says where to continue (next_line, next_byte or offset)", read_only=True,
+          file_path="Path to the file to read",
+          offset="Optional: Character offset to continue a truncated whole-file read (files under 1 MB "
+                 "only; other reads continue from next_line or next_byte)",
+          start_line="Optional: First line to read (1-based); with pattern, the line to search from",
+          end_line="Optional: Last line to read (inclusive)",
+          start_byte="Optional: First byte of a byte range",
+          end_byte="Optional: End of a byte range (exclusive)",
+          tail="Optional: Read only the last N lines",
+          pattern="Optional: Regular expression; returns the matching lines with their line numbers",
+          ignore_case="Optional: Match pattern case-insensitively",
+          max_matches="Optional: Maximum matching lines to return (default 100)")
+    def read_file_tool(self, file_path: str, offset: int = 0, start_line: int = None, end_line: int = None,
+                       start_byte: int = None, end_byte: int = None, tail: int = None, pattern: str = None,
+                       ignore_case: bool = False, max_matches: int = 100) -> dict:
+        """Tool to read file contents, paged from `offset` characters when over budget.
+
+        Ranges, tail and pattern search go through `file_reader`, which never
+        holds more than one budget's worth of the file in memory.
+        """
+        try:
+            self.csv_cache.flush(file_path)
+            self._sync_csv(file_path)
+            line_range = start_line is not None or end_line is not None
+            byte_range = start_byte is not None or end_byte is not None
+            if sum((line_range and pattern is None, byte_range, tail is not None, pattern is not None)) > 1:
+                return dumps({"error": "Use only one of a line range, a byte range, tail or pattern"})
+            if offset and (line_range or byte_range or tail is not None or pattern is not None):
+                return dumps({"error": "offset only continues a whole-file read; "
+                                       "continue ranges from next_line or next_byte"})
+            reader = self.file_reader
+            first_line = 1 if start_line is None else start_line
+            if pattern is not None:
+                return self.shaper.excerpt(lambda max_bytes: reader.search(
+                    file_path, pattern, first_line, max_matches, ignore_case, max_bytes))
+            if tail is not None:
+                return self.shaper.excerpt(lambda max_bytes: reader.tail(file_path, tail, max_bytes))
+            if byte_range:
+                return self.shaper.excerpt(lambda max_bytes: reader.byte_range(
+                    file_path, 0 if start_byte is None else start_byte, end_byte, max_bytes))
+            if line_range:
+                return self.shaper.excerpt(lambda max_bytes: reader.lines(
+                    file_path, first_line, end_line, max_bytes))
+            size = os.path.getsize(file_path)
+            if size > self.READ_FILE_WHOLE_BYTES:
+                # Too big to send or even load whole: start from the first lines
+                if offset:
+                    return dumps({"error": "offset is a character offset for files under 1 MB; "
+                                           "continue large files from next_line or next_byte"})
+                return self.shaper.excerpt(lambda max_bytes: dict(
+                    reader.lines(file_path, 1, None, max_bytes),
+                    hint="Large file: read more with start_line/end_line, tail or pattern"), raw_bytes=size)
+            with open(file_path, 'r') as file:
+                content = file.read()
+                return self.shaper.text(content, offset)
+        except re.error as e:
+            return dumps({"error": f"Invalid pattern: {str(e)}"})
+        except Exception as e:
+            return dumps({"error": f"Error reading file: {str(e)}"})
+
+    @tool("write_file", "Write content to a file", writes=True,
+          file_path="Path to the file to write",
+          content="Content to write to the file")
+    def write_file_tool(self, file_path: str, content: str) -> dict:
+        """Tool to write content to a file"""
+        try:
+            self._forget_csv(file_path)
+            with atomic_write(file_path) as file:
+                file.write(content)
+            return dumps({"success": True, "message": f"Successfully wrote to {file_path}"})
+        except Exception as e:
+            return dumps({"error": f"Error writing file: {str(e)}"})
+
+    @tool("create_csv", "Create a new CSV file with headers and data", writes=True,
+          file_path="Path to the CSV file to create",
+          headers="List of column headers",
+          data="List of rows, where each row is a list of values")
+    def create_csv_tool(self, file_path: str, headers: List[str], data: List[List[str]]) -> dict:
+        """Tool to create a new CSV file with headers and data"""
+        try:
+            self._forget_csv(file_path)
+            with atomic_write(file_path, newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(headers)
+                writer.writerows(data)
+            return dumps({"success": True, "message": f"Successfully created CSV file at {file_path}"})
+        except Exception as e:
+            return dumps({"error": f"Error creating CSV file: {str(e)}"})
+
+    @tool("read_csv", "Read contents of a CSV file", read_only=True, process_pool=True,
+          file_path="Path to the CSV file to read",
+          num_rows="Optional: Number of rows to read (reads all if not specified)")
+    def read_csv_tool(self, file_path: str, num_rows: int = None) -> dict:
+        """Tool to read CSV file contents"""
+        try:
+            df = self._load_frame(file_path)
+            if num_rows:
+                df = df.head(num_rows)
+            return self.shaper.frame(df)
+        except Exception as e:
+            return dumps({"error": f"Error reading CSV file: {str(e)}"})
+
+    @tool("read_rows", "Read a page of rows from a CSV file, e.g. the rows omitted from a truncated result",
+          read_only=True,
+          file_path="Path to the CSV file",
+          offset="Index of the first row to return (0-based)",
+          limit="Optional: Maximum number of rows to return (default 100)",
+          columns="Optional: Columns to return (all if not specified)")
+    def read_rows_tool(self, file_path: str, offset: int, limit: int = 100, columns: List[str] = None) -> dict:
+        """Tool to page through the rows of a CSV file"""
+        try:
+            df = self._load_frame(file_path)
+            for name in columns or []:
+                if name not in df.columns:
+                    return dumps({"error": f"Column '{name}' not found"})
+            if columns:
+                df = df[columns]
+            return self.shaper.page(df, max(offset, 0), max(limit, 0))
+        except Exception as e:
+            return dumps({"error": f"Error reading CSV file: {str(e)}"})
+
+    @tool("append_csv", "Append rows to an existing CSV file", writes=True,
+          file_path="Path to the CSV file",
+          data="List of rows to append, where each row is a list of values")
+    def append_csv_tool(self, file_path: str, data: List[List[str]]) -> dict:
+        """Tool to append rows to an existing CSV file.
+
+        Rows go to a write-behind buffer that is written to the file in one
+        append when it fills up or before the file is next read or edited.
+        """
+        try:
+            # Unflushed frame edits may have changed the header the rows are checked against
+            self.csv_cache.flush(file_path)
+            if self.csv_appends.append(file_path, data):
+                self._sync_csv(file_path)
+            return dumps({"success": True, "message": f"Successfully appended {len(data)} rows to {file_path}"})
+        except ValueError as e:
+            return dumps({"error": str(e)})
+        except Exception as e:
+            return dumps({"error": f"Error appending to CSV file: {str(e)}"})
+
+    @tool("update_csv", "Update a specific cell in a CSV file", writes=True,
+          file_path="Path to the CSV file",
+          row_index="Index of the row to update (0-based)",
+          column_name="Name of the column to update",
+          new_value="New value to set")
+    def update_csv_tool(self, file_path: str, row_index: int, column_name: str, new_value: str) -> dict:
+        """Tool to update a specific cell in a CSV file"""
+        try:
+            self._update_cells(file_path, [(row_index, column_name, new_value)])
+            return dumps({"success": True, "message": f"Successfully updated cell at row {row_index}, column '{column_name}'"})
+        except (IndexError, KeyError) as e:
+            return dumps({"error": e.args[0]})
+        except Exception as e:
+            return dumps({"error": f"Error updating CSV file: {str(e)}"})
+
+    @tool("update_cells", "Update many cells in a CSV file in one pass", writes=True,
+          file_path="Path to the CSV file",
+          updates={
+              "description": "List of cell updates, each with row_index (0-based), column_name and new_value",
+              "items": {
+                  "type": "object",
+                  "properties": {
+                      "row_index": {"type": "integer"},
+                      "column_name": {"type": "string"},
+                      "new_value": {"type": "string"}
+                  },
+                  "required": ["row_index", "column_name", "new_value"]
+              }
+          })
+    def update_cells_tool(self, file_path: str, updates: List[Dict]) -> dict:
+        """Tool to update many cells in a CSV file in one pass"""
+        try:
+            edits = [(update["row_index"], update["column_name"], update["new_value"]) for update in updates]
+            self._update_cells(file_path, edits)
+            return dumps({"success": True, "message": f"Successfully updated {len(edits)} cells in {file_path}"})
+        except (IndexError, KeyError) as e:
+            return dumps({"error": e.args[0]})
+        except Exception as e:
+            return dumps({"error": f"Error updating CSV file: {str(e)}"})
+
+    @tool("query_csv", "Query CSV file using pandas query syntax", read_only=True, process_pool=True,
+          file_path="Path to the CSV file",
+          query="Query string using pandas query syntax (e.g., 'age > 25 and city == \"New York\"')",
+          columns="Optional: Columns to return (all if not specified)",
+          limit="Optional: Maximum rows to return (default 100, at most 1000)",
+          offset="Optional: Result rows to skip, to page through a truncated result from its next_offset",
+          aggregate="Optional: Map of column name to count, sum, mean, min or max, computed over the matching rows",
+          group_by="Optional: Column to group aggregates by",
+          stream="Optional: Force (true) or disable (false) chunked reading; automatic for large files")
+    def query_csv_tool(self, file_path: str, query: str = None, columns: List[str] = None,
+                       limit: int = None, aggregate: Dict[str, str] = None, group_by: str = None,
+                       stream: bool = None, offset: int = 0) -> dict:
+        """Tool to query CSV file using pandas query syntax.
+
+        Files of at least STREAM_QUERY_BYTES that are not already cached are
+        read in chunks of QUERY_CHUNK_ROWS, so memory stays flat with file
+        size; set `stream` to force either mode. Row results stop at `limit`
+        (at most QUERY_MAX_ROWS) after skipping `offset` matching rows (or
+        aggregate rows), and `aggregate`/`group_by` are computed in the same
+        single pass.
+        """
+        try:
+            if offset < 0:
+                return dumps({"error": "offset must be at least 0"})
+            if limit is not None and limit < 0:
+                return dumps({"error": "limit must be at least 1"})
+            limit = min(limit or self.QUERY_ROW_LIMIT, self.QUERY_MAX_ROWS)
+            aggregator = QueryAggregator(aggregate, group_by) if aggregate else None
+            if group_by and not aggregator:
+                return dumps({"error": "group_by requires aggregate"})
+            if stream is None:
+                stream = (self.csv_cache.peek(file_path) is None
+                          and os.path.getsize(file_path) >= self.STREAM_QUERY_BYTES)
+
+            if stream:
+                self.csv_cache.flush(file_path)
+                self._sync_csv(file_path)
+                header = pd.read_csv(file_path, nrows=0).columns.tolist()
+                usecols = self._query_columns(header, query, columns, aggregate, group_by)
+                chunks = pd.read_csv(file_path, chunksize=self.QUERY_CHUNK_ROWS, usecols=usecols)
+            else:
+                df = self._load_frame(file_path)
+                self._query_columns(df.columns.tolist(), query, columns, aggregate, group_by)
+                chunks = [df]
+
+            rows, matched, scanned, stopped_early, skip = [], 0, 0, False, offset
+            try:
+                for chunk in chunks:
+                    scanned += len(chunk)
+                    result = chunk.query(query) if query else chunk
+                    matched += len(result)
+                    if aggregator:
+                        aggregator.add(result)
+                        continue
+                    if skip:
+                        skipped = min(skip, len(result))
+                        result, skip = result.iloc[skipped:], skip - skipped
+                    if columns:
+                        result = result[columns]
+                    collected = sum(len(part) for part in rows)
+                    rows.append(result.head(limit - collected))
+                    if stream and collected + len(rows[-1]) >= limit:
+                        stopped_early = True
+                        break
+            finally:
+                if stream:
+                    chunks.close()
+
+            if aggregator:
+                result = aggregator.result()
+                truncated = len(result) > offset + limit
+                result = result.iloc[offset:offset + limit]
+            else:
+                result = pd.concat(rows) if rows else pd.DataFrame(columns=columns or [])
+                truncated = stopped_early or matched > offset + len(result)
+            extra = {
+                "matched_rows": matched,
+                "rows_scanned": scanned,
+                "row_limit_reached": truncated,
+                "stopped_early": stopped_early
+            }
+            if truncated:
+                extra["next_offset"] = offset + len(result)
+            # Offsets count result rows, not file rows, so page with query_csv itself
+            return self.shaper.frame(result, extra=extra, offset=offset,
+                                     hint="Call query_csv again with the same arguments and "
+                                          "offset=next_offset to page through the omitted rows")
+        except KeyError as e:
+            return dumps({"error": e.args[0]})
+        except Exception as e:
+            return dumps({"error": f"Error querying CSV file: {str(e)}"})
+
+    @staticmethod
+    def _query_columns(header: List[str], query: str, columns: List[str],
+                       aggregate: Dict[str, str], group_by: str):
+        """Check requested columns and return the ones a streamed query must read.
+
+        Returns None (read everything) unless the request projects or
+        aggregates. Any header name that appears in the query text is kept,
+        which may read a column more than needed but never too few.
+        """
+        requested = list(columns or []) + list(aggregate or {}) + ([group_by] if group_by else [])
+        for name in requested:
+            if name not in header:
+                raise KeyError(f"Column '{name}' not found")
+        if not columns and not aggregate:
+            return None
+        needed = set(requested)
+        if query:
+            needed.update(name for name in header if name in query)
+        return [name for name in header if name in needed]
+
+    @tool("add_columns_csv", "Add new columns to an existing CSV file", writes=True,
+          file_path="Path to the CSV file",
+          new_columns="Dictionary of column names and their data")
+    def add_columns_csv_tool(self, file_path: str, new_columns: Dict[str, List[str]]) -> dict:
+        """Tool to add new columns to an existing CSV file.
+
+        When the file is not already cached as a frame, the new values are
+        streamed alongside the existing rows into a temp file that replaces
+        the original, so the CSV is never parsed into pandas.
+        """
+        try:
+            self._sync_csv(file_path)
+            if self.csv_cache.peek(file_path) is None:
+                row_count, header = self._stream_add_columns(file_path, new_columns)
+                if row_count is None:
+                    return dumps({"error": header})
+                return dumps({
+                    "success": True,
+                    "message": f"Successfully added columns: {', '.join(new_columns.keys())}",
+                    "rows": row_count,
+                    "columns": header
+                })
+
+            # Read existing CSV
+            df = self._load_frame(file_path)
+            
+            # Check every column before touching the shared cached frame
+            for column_name, column_data in new_columns.items():
+                if len(column_data) != len(df):
+                    return dumps({"error": f"Column {column_name} data length ({len(column_data)}) does not match CSV length ({len(df)})"})
+
+            # Add each new column
+            for column_name, column_data in new_columns.items():
+                df[column_name] = column_data
+            
+            # Save back to CSV
+            self.csv_cache.mark_modified(file_path)
+            return self.shaper.frame(df, extra={
+                "success": True, 
+                "message": f"Successfully added columns: {', '.join(new_columns.keys())}"
+            })
+        except Exception as e:
+            return dumps({"error": f"Error adding columns to CSV file: {str(e)}"})
+
+    def _stream_add_columns(self, file_path: str, new_columns: Dict[str, List[str]]):
+        """Copy the CSV row by row with the new column values added.
+
+        Returns (row count, new header), or (None, error message) when a column
+        has the wrong length, in which case the original file is left as is.
+        Columns that already exist are overwritten in place; blank lines are
+        dropped, as pandas does.
+        """
+        header, terminator = self.csv_appends.header(file_path)
+        positions = [header.index(name) if name in header else None for name in new_columns]
+        new_header = header + [name for name, position in zip(new_columns, positions) if position is None]
+        values = list(new_columns.values())
+        row_count = 0
+        try:
+            with atomic_write(file_path, newline='', encoding='utf-8') as target:
+                with open(file_path, newline='', encoding='utf-8-sig') as source:
+                    reader = csv.reader(source)
+                    writer = csv.writer(target, lineterminator=terminator)
+                    next(reader, None)
+                    writer.writerow(new_header)
+                    for row in reader:
+                        if not row:
+                            continue
+                        row += [""] * (len(header) - len(row))
+                        for column, position in zip(values, positions):
+                            value = column[row_count] if row_count < len(column) else ""
+                            if position is None:
+                                row.append(value)
+                            else:
+                                row[position] = value
+                        writer.writerow(row)
+                        row_count += 1
+                for column_name, column_data in new_columns.items():
+                    if len(column_data) != row_count:
+                        raise ValueError(f"Column {column_name} data length ({len(column_data)}) "
+                                         f"does not match CSV length ({row_count})")
+        except ValueError as e:
+            return None, str(e)
+        self._forget_csv(file_path)
+        return row_count, new_header
+
+    def _write_lock(self, file_path: str) -> threading.Lock:
+        with self._write_locks_lock:
+            return self._write_locks.setdefault(os.path.abspath(file_path), threading.Lock())
+
+    def execute_tool(self, function_name: str, function_args: dict) -> str:
+        """Run a single tool call, through the response cache when one is set"""
+        cache = self.response_cache
+        file_path = function_args.get("file_path")
+        if TOOLS.has_flag(function_name, "writes") and isinstance(file_path, str):
+            with self._write_lock(file_path):
+                content = self._dispatch_tool(function_name, function_args)
+            if cache is not None:
+                cache.invalidate_path(file_path)
+            return content
+
+        if cache is None:
+            return self._dispatch_tool(function_name, function_args)
+
+        if TOOLS.has_flag(function_name, "read_only") and isinstance(file_path, str):
+            if self.csv_appends.paths(file_path):
+                # Key on the file as it will be read, not as it was before the buffered rows
+                self._sync_csv(file_path)
+            key = cache.key("tool", function_name, function_args,
+                            cache.file_fingerprint(file_path), self.shaper.budget_tokens)
+            content = cache.get(key, "tool")
+            if content is None:
+                content = self._dispatch_tool(function_name, function_args)
+                if not content.startswith('{"error"'):
+                    cache.put(key, "tool", content, paths=[file_path])
+            return content
+
+        return self._dispatch_tool(function_name, function_args)
+
+    def _dispatch_tool(self, function_name: str, function_args: dict) -> str:
+        """Validate the arguments and call the registered tool"""
+        spec = TOOLS.get(function_name)
+        if spec is None:
+            return dumps({"error": f"Unknown tool: {function_name}"})
+        error = TOOLS.validate(function_name, function_args)
+        if error:
+            return dumps({"error": f"Invalid arguments for {function_name}: {error}"})
+        if spec["bound"]:
+            return spec["function"](self, **function_args)
+        return spec["function"](**function_args)
+
+    def format_message_for_history(self, message):
+        """Format message object for conversation history"""
+        if hasattr(message, 'tool_calls'):
+            return {
+                "role": message.role,
+                "content": message.content if message.content else "",
+                "tool_calls": [
+                    {
+                        "id": tool_call.id,
+                        "type": tool_call.type,
+                        "function": {
+                            "name": tool_call.function.name,
+                            "arguments": tool_call.function.arguments
+                        }
+                    }
+                    for tool_call in message.tool_calls
+                ] if message.tool_calls else []
+            }
+        return {
+            "role": message.role,
+            "content": message.content if message.content else ""
+        }
+
+    def get_tools(self, names: List[str] = None) -> List[dict]:
+        """Schemas for the tools to offer: `names`, else this instance's `tool_names`, else all"""
+        return TOOLS.schemas(names if names is not None else self.tool_names)
+
+    def chat(self, user_input: str, tools: List[str] = None):
+        tools = self.get_tools(tools)
+
+        # Add user message to conversation history
+        self.conversation_history.append({"role": "user", "content": user_input})
+        self.session.last_error = None
+
+        with self.tracer.span("turn", session=self.session.session_id) as span:
+            try:
+                # Keep calling the model until it stops asking for tools. The last
+                # round is sent without tools so the model has to answer.
+                for round_number in range(self.max_tool_rounds + 1):
+                    span.set(rounds=round_number + 1)
+                    round_tools = tools if round_number < self.max_tool_rounds else None
+                    message = self._complete(self.conversation_history, round_tools)
+
+                    if not message.get("tool_calls"):
+                        break
+
+                    # Add assistant's response to conversation
+                    self.conversation_history.append(message)
+                    results = self.run_tools(self.parse_tool_calls(message["tool_calls"]))
+                    self._add_tool_results(self.conversation_history, results)
+
+                return self._finish_turn(self.conversation_history, message)
+
+            except Exception as e:
+                span.set(error=type(e).__name__)
+                self.session.last_error = str(e)
+                self.renderer.error(str(e))
+                return f"An error occurred: {str(e)}"
+
+            finally:
+                self._flush_turn()
+
+    def _completion_kwargs(self, messages: List[dict], tools) -> dict:
+        if isinstance(messages, ConversationHistory):
+            messages.compact()
+            messages.record_prompt(estimate_tokens(dumps(tools)) if tools else 0)
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_completion_tokens": 4096,
+        }
+        if tools:
+            kwargs["tools"] = tools
+            kwargs["tool_choice"] = "auto"
+        return kwargs
+
+    def _complete(self, messages: List[dict], tools) -> dict:
+        """Make one completion call and return the assistant message as a history dict"""
+        kwargs = self._completion_kwargs(messages, tools)
+        cached = self._cached_completion(kwargs)
+        if cached is not None:
+            return cached
+        with self.tracer.span("api_call", **self._request_attributes(kwargs)) as span:
+            reserved = self._prompt_estimate(kwargs)
+            for attempt in itertools.count():
+                span.set(rate_limit_wait_ms=self.rate_limiter.acquire(reserved) * 1000)
+                try:
+                    message, usage = self._request(kwargs, span)
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(span, attempt, e)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+            self._record_response(span, message, usage)
+            self._settle_usage(reserved, usage)
+        self._store_completion(kwargs, message)
+        return message
+
+    def _request(self, kwargs: dict, span: Span):
+        """One completion request; returns the history-format message and the usage block"""
+        self.renderer.begin_completion()
+        try:
+            if not self.stream:
+                response = self.client.chat.completions.create(**kwargs)
+                return self._message_from_response(response), getattr(response, "usage", None)
+            accumulator = StreamAccumulator()
+            for chunk in self.client.chat.completions.create(stream=True, **kwargs):
+                text = accumulator.add(chunk)
+                if text:
+                    self._render_token(span, text)
+            return accumulator.message(), accumulator.usage
+        finally:
+            self.renderer.end_completion()
+
+    def _retry_delay(self, span: Span, attempt: int, error: Exception):
+        """Seconds to wait before retrying a failed request, or None to give up"""
+        if "first_token_ms" in span.attributes:
+            # Part of the answer is already on screen; a retry would repeat it
+            return None
+        delay = self.retry_policy.delay(attempt, error)
+        if delay is None:
+            return None
+        if getattr(error, "status_code", None) == 429:
+            # Every session backs off, not just the one that was throttled
+            self.rate_limiter.pause(delay)
+        span.set(retries=attempt + 1, last_error=getattr(error, "status_code", type(error).__name__))
+        return delay
+
+    @staticmethod
+    def _prompt_estimate(kwargs: dict) -> int:
+        messages = kwargs["messages"]
+        if isinstance(messages, ConversationHistory) and messages.prompt_sizes:
+            return messages.prompt_sizes[-1]["tokens"]
+        return estimate_tokens(dumps(messages)) + estimate_tokens(dumps(kwargs.get("tools") or []))
+
+    def _settle_usage(self, reserved: int, usage):
+        if usage is not None:
+            self.rate_limiter.settle(reserved, usage.prompt_tokens + usage.completion_tokens)
+
+    def _request_attributes(self, kwargs: dict) -> dict:
+        return {
+            "model": kwargs["model"],
+            "stream": self.stream,
+            "messages": len(kwargs["messages"]),
+            "tools": len(kwargs.get("tools") or []),
+            "request_bytes": len(dumps(kwargs["messages"]).encode()),
+        }
+
+    def _render_token(self, span: Span, text: str):
+        """Render streamed text, recording time to first token and time spent rendering"""
+        if "first_token_ms" not in span.attributes:
+            span.set(first_token_ms=span.elapsed_ms())
+        start = time.perf_counter()
+        self.renderer.token(text)
+        span.set(render_ms=span.attributes.get("render_ms", 0.0) + (time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _record_response(span: Span, message: dict, usage):
+        span.set(response_bytes=len(message["content"].encode()),
+                 tool_calls=len(message.get("tool_calls") or []))
+        if usage is not None:
+            span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+    def _completion_cache_key(self, kwargs: dict) -> str:
+        return self.response_cache.key(
+            "completion", kwargs["model"], kwargs["messages"], kwargs.get("tools"),
+            kwargs["temperature"], kwargs["max_completion_tokens"])
+
+    def _cached_completion(self, kwargs: dict):
+        """Replay a cached assistant message for identical request parameters"""
+        if self.response_cache is None:
+            return None
+        content = self.response_cache.get(self._completion_cache_key(kwargs), "completion")
+        if content is None:
+            return None
+        message = json.loads(content)
+        if self.stream and message["content"]:
+            self.renderer.begin_completion()
+            self.renderer.token(message["content"])
+            self.renderer.end_completion()
+        return message
+
+    def _store_completion(self, kwargs: dict, message: dict):
+        if self.response_cache is not None:
+            self.response_cache.put(self._completion_cache_key(kwargs), "completion", dumps(message))
+
+    def _message_from_response(self, response) -> dict:
+        message = self.format_message_for_history(response.choices[0].message)
+        if not message.get("tool_calls"):
+            message.pop("tool_calls", None)
+        return message
+
+    @staticmethod
+    def parse_tool_calls(tool_calls: List[dict]) -> List[dict]:
+        """Turn history-format tool calls into executor calls with decoded arguments"""
+        calls = []
+        for tool_call in tool_calls:
+            try:
+                function_args = json.loads(tool_call["function"]["arguments"] or "{}")
+            except json.JSONDecodeError:
+                function_args = {}
+            calls.append({"id": tool_call["id"], "name": tool_call["function"]["name"], "args": function_args})
+        return calls
+
+    def _add_tool_results(self, messages: List[dict], results: List[dict]):
+        for result in results:
+            with self.tracer.span("render", output="tool_result"):
+                self.renderer.tool_result(result)
+
+            # Add tool response to conversation
+            messages.append({
+                "tool_call_id": result["tool_call_id"],
+                "role": "tool",
+                "name": result["name"],
+                "content": result["content"]
+            })
+
+    def _finish_turn(self, messages: List[dict], message: dict) -> str:
+        thinking, response = extract_think_content(message["content"])
+        messages.append({"role": "assistant", "content": response})
+        if not self.stream:
+            with self.tracer.span("render", output="response"):
+                self.renderer.response(thinking, response)
+        return response
+
+
+class AsyncGroqDeepseek(GroqDeepseek):
+    """asyncio variant of GroqDeepseek for serving many sessions in one process.
+
+    Each session keeps its own ChatSession history, tools run in worker threads
+    so they never block the event loop, and `max_concurrent_requests` caps the
+    number of in-flight API calls across all sessions. Output is headless
+    unless a renderer is passed in.
+    """
+
+    def __init__(self, max_concurrent_requests: int = 16, max_tool_workers: int = 4,
+                 max_tool_rounds: int = 8, stream: bool = True, client=None, renderer=None,
+                 csv_cache: DataFrameCache = None, csv_rows: CsvRowStore = None,
+                 csv_sidecar: CsvSidecar = None, csv_appends: CsvAppendBuffer = None,
+                 result_token_budget: int = 2000, history_policy: HistoryPolicy = None,
+                 response_cache: ResponseCache = None, tool_names: List[str] = None,
+                 tracer: Tracer = None, retry_policy: RetryPolicy = None,
+                 rate_limiter: RateLimiter = None, file_reader: FileReader = None, lazy_writes: bool = False):
+        super().__init__(
+            max_tool_workers=max_tool_workers,
+            max_tool_rounds=max_tool_rounds,
+            stream=stream,
+            client=client,
+            renderer=renderer if renderer is not None else NullRenderer(),
+            csv_cache=csv_cache,
+            csv_rows=csv_rows,
+            csv_sidecar=csv_sidecar,
+            csv_appends=csv_appends,
+            result_token_budget=result_token_budget,
+            history_policy=history_policy,
+            response_cache=response_cache,
+            tool_names=tool_names,
+            tracer=tracer,
+            retry_policy=retry_policy,
+            rate_limiter=rate_limiter,
+            file_reader=file_reader,
+            lazy_writes=lazy_writes
+        )
+        self.max_concurrent_requests = max_concurrent_requests
+        # (loop, semaphore): an asyncio.Semaphore only works on the loop it was first used on
+        self._request_slots = None
+        # Sessions this instance has served, for the prompt-size totals in stats()
+        self._sessions = weakref.WeakSet()
+
+    def _default_client(self):
+        return groq_client(async_client=True)
+
+    def new_session(self, session_id: str = None) -> ChatSession:
+        session = ChatSession(session_id, self.history_policy)
+        self._sessions.add(session)
+        return session
+
+    def stats(self) -> dict:
+        """As GroqDeepseek.stats, with prompt sizes totalled over the live sessions"""
+        stats = super().stats()
+        sessions = list(self._sessions)
+        tokens = [size["tokens"] for session in sessions for size in session.history.prompt_sizes]
+        stats["history"] = {"sessions": len(sessions), "requests": len(tokens)}
+        if tokens:
+            stats["history"]["mean_prompt_tokens"] = sum(tokens) // len(tokens)
+            stats["history"]["max_prompt_tokens"] = max(tokens)
+        return stats
+
+    async def chat(self, session: ChatSession, user_input: str, tools: List[str] = None) -> str:
+        self._sessions.add(session)
+        tools = self.get_tools(tools)
+        session.history.append({"role": "user", "content": user_input})
+        session.last_error = None
+
+        with self.tracer.span("turn", session=session.session_id) as span:
+            try:
+                for round_number in range(self.max_tool_rounds + 1):
+                    span.set(rounds=round_number + 1)
+                    round_tools = tools if round_number < self.max_tool_rounds else None
+                    message = await self._complete(session.history, round_tools)
+
+                    if not message.get("tool_calls"):
+                        break
+
+                    session.history.append(message)
+                    # to_thread copies the context, so tool spans nest under this turn
+                    results = await asyncio.to_thread(
+                        self.run_tools, self.parse_tool_calls(message["tool_calls"]))
+                    self._add_tool_results(session.history, results)
+
+                return self._finish_turn(session.history, message)
+
+            except Exception as e:
+                span.set(error=type(e).__name__)
+                session.last_error = str(e)
+                self.renderer.error(str(e))
+                return f"An error occurred: {str(e)}"
+
+            finally:
+                await asyncio.to_thread(self._flush_turn)
+
+    def _slots(self) -> asyncio.Semaphore:
+        """The request semaphore for the running loop, so the instance survives repeated asyncio.run calls"""
+        loop = asyncio.get_running_loop()
+        if self._request_slots is None or self._request_slots[0] is not loop:
+            self._request_slots = (loop, asyncio.Semaphore(self.max_concurrent_requests))
+        return self._request_slots[1]
+
+    async def _complete(self, messages: List[dict], tools) -> dict:
+        kwargs = self._completion_kwargs(messages, tools)
+        cached = self._cached_completion(kwargs)
+        if cached is not None:
+            return cached
+        with self.tracer.span("api_call", **self._request_attributes(kwargs)) as span:
+            reserved = self._prompt_estimate(kwargs)
+            for attempt in itertools.count():
+                # Wait for rate-limit budget before taking a connection slot
+                span.set(rate_limit_wait_ms=await self.rate_limiter.acquire_async(reserved) * 1000)
+                queued = time.perf_counter()
+                try:
+                    async with self._slots():
+                        span.set(queued_ms=(time.perf_counter() - queued) * 1000)
+                        message, usage = await self._request(kwargs, span)
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(span, attempt, e)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+            self._record_response(span, message, usage)
+            self._settle_usage(reserved, usage)
+        self._store_completion(kwargs, message)
+        return message
+
+    async def _request(self, kwargs: dict, span: Span):
+        self.renderer.begin_completion()
+        try:
+            if not self.stream:
+                response = await self.client.chat.completions.create(**kwargs)
+                return self._message_from_response(response), getattr(response, "usage", None)
+            accumulator = StreamAccumulator()
+            async for chunk in await self.client.chat.completions.create(stream=True, **kwargs):
+                text = accumulator.add(chunk)
+                if text:
+                    self._render_token(span, text)
+            return accumulator.message(), accumulator.usage
+        finally:
+            self.renderer.end_completion()
@@ -0,0 +1,136 @@
+"""Headless batch runs over a JSONL file of prompts"""
+import asyncio
+import json
+import os
+import time
+from typing import List
+
+from .agent import AsyncGroqDeepseek
+from .render import console
+from .tracing import Tracer
+from .transport import RateLimiter
+from .util import dumps, load_env
+
+
+def env_options() -> dict:
+    """Tracer and rate limiter configured from GROQ_TRACE_FILE/FORMAT and GROQ_RPM/TPM"""
+    load_env()
+    return {
+        "tracer": Tracer(os.getenv("GROQ_TRACE_FILE"), os.getenv("GROQ_TRACE_FORMAT", "jsonl")),
+        "rate_limiter": RateLimiter(float(os.getenv("GROQ_RPM", 0)) or None,
+                                    float(os.getenv("GROQ_TPM", 0)) or None),
+    }
+
+
+def completed_ids(output_path: str) -> set:
+    """Ids already answered successfully in an output file (a torn last line is ignored)"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def read_prompts(input_path: str, id_field: str = "id", prompt_field: str = "prompt") -> List[dict]:
+    """Load batch jobs from JSONL; lines without `id_field` are keyed by line number"""
+    jobs = []
+    with open(input_path) as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            jobs.append({
+                "id": str(record.get(id_field, f"line-{number}")),
+                "line": number,
+                "prompt": record.get(prompt_field),
+                "tools": record.get("tools"),
+            })
+    return jobs
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int = 8, id_field: str = "id",
+                    prompt_field: str = "prompt", chat: AsyncGroqDeepseek = None, resume: bool = True,
+                    lazy_writes: bool = False) -> dict:
+    """Run each prompt in a JSONL file as its own session, at most `concurrency` at a time.
+
+    Results are appended to `output_path` as they finish, one JSON line each
+    with the id, status ("ok" or "error"), response and timing. Pending CSV
+    writes are flushed before a result is recorded, so after a crash a rerun
+    with `resume` skips every id already recorded as ok and retries the rest.
+    """
+    jobs = read_prompts(input_path, id_field, prompt_field)
+    done = completed_ids(output_path) if resume else set()
+    pending = [job for job in jobs if job["id"] not in done]
+    owns_chat = chat is None
+    if owns_chat:
+        chat = AsyncGroqDeepseek(stream=False, max_concurrent_requests=concurrency, lazy_writes=lazy_writes,
+                                 **env_options())
+
+    slots = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+    counts = {"ok": 0, "error": 0}
+    start = time.perf_counter()
+    last_report = start
+
+    async def run_job(job: dict, output):
+        nonlocal last_report
+        async with slots:
+            session = chat.new_session(job["id"])
+            job_start = time.perf_counter()
+            if not isinstance(job["prompt"], str):
+                response, error = None, f"missing '{prompt_field}'"
+            else:
+                response = await chat.chat(session, job["prompt"], job["tools"])
+                error = session.last_error
+            # Make the session's file writes durable before reporting it done
+            await asyncio.to_thread(chat.flush)
+        record = {
+            "id": job["id"],
+            "line": job["line"],
+            "status": "error" if error else "ok",
+            "response": None if error else response,
+            "error": error,
+            "elapsed_s": round(time.perf_counter() - job_start, 3),
+            "prompt_tokens": session.history.stats().get("last_prompt_tokens"),
+        }
+        async with write_lock:
+            output.write(dumps(record) + "\n")
+            output.flush()
+            os.fsync(output.fileno())
+            counts[record["status"]] += 1
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                last_report = now
+                finished = counts["ok"] + counts["error"]
+                console.print(f"[dim]{finished}/{len(pending)} sessions, "
+                              f"{finished / (now - start) * 60:.1f} sessions/min[/]")
+
+    try:
+        with open(output_path, "a+") as output:
+            # A crash can leave a torn last line; start on a fresh one
+            if output.tell():
+                output.seek(output.tell() - 1)
+                if output.read(1) != "\n":
+                    output.write("\n")
+            await asyncio.gather(*(run_job(job, output) for job in pending))
+    finally:
+        if owns_chat:
+            chat.close()
+
+    elapsed = time.perf_counter() - start
+    finished = counts["ok"] + counts["error"]
+    return {
+        "total": len(jobs),
+        "skipped": len(jobs) - len(pending),
+        "ok": counts["ok"],
+        "error": counts["error"],
+        "seconds": round(elapsed, 3),
+        "sessions_per_minute": round(finished / elapsed * 60, 1) if elapsed else 0.0,
+    }
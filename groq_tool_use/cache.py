@@ -0,0 +1,134 @@
+"""Persistent cache for completions and read-only tool results"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+from .util import orjson
+
+
+class ResponseCache:
+    """Content-addressed cache for completions and read-only tool results.
+
+    Entries live in a SQLite file with an in-memory LRU of the most recent
+    ones in front of it. Keys are hashes of everything that determines the
+    result; tool entries also record the files they read so a write through
+    a tool can drop them (edits made outside the tools change the file
+    fingerprint that is part of the key). Entries expire after `ttl` seconds,
+    and the least recently used are evicted once stored values exceed
+    `max_bytes`.
+    """
+
+    def __init__(self, path: str = ".groq_cache.sqlite", ttl: float = 24 * 3600,
+                 max_bytes: int = 256 * 1024 * 1024, memory_entries: int = 256):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.counters = {}
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, kind TEXT, value TEXT, "
+                "created REAL, accessed REAL, size INTEGER)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS deps (key TEXT, path TEXT)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS deps_path ON deps (path)")
+
+    @staticmethod
+    def key(*parts) -> str:
+        if orjson is not None:
+            encoded = orjson.dumps(parts, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            encoded = json.dumps(parts, default=str, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    @staticmethod
+    def file_fingerprint(file_path: str):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return [os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size]
+
+    def _count(self, kind: str, outcome: str):
+        counts = self.counters.setdefault(kind, {"hits": 0, "misses": 0})
+        counts[outcome] += 1
+
+    def get(self, key: str, kind: str):
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self.memory.move_to_end(key)
+                self._count(kind, "hits")
+                return entry[1]
+            row = self._db.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._delete([key])
+                self._count(kind, "misses")
+                return None
+            with self._db:
+                self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._remember(key, row[1], row[0])
+            self._count(kind, "hits")
+            return row[0]
+
+    def _remember(self, key: str, created: float, value: str):
+        self.memory[key] = (created, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def put(self, key: str, kind: str, value: str, paths: List[str] = ()):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, kind, value, now, now, len(value)))
+            self._db.execute("DELETE FROM deps WHERE key = ?", (key,))
+            self._db.executemany("INSERT INTO deps VALUES (?, ?)",
+                                 [(key, os.path.abspath(path)) for path in paths])
+            self._remember(key, now, value)
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append(key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._delete(victims)
+
+    def _delete(self, keys: List[str]):
+        with self._db:
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+            self._db.executemany("DELETE FROM deps WHERE key = ?", [(key,) for key in keys])
+        for key in keys:
+            self.memory.pop(key, None)
+
+    def invalidate_path(self, file_path: str):
+        """Drop every entry that read `file_path`"""
+        with self._lock:
+            rows = self._db.execute("SELECT key FROM deps WHERE path = ?", (os.path.abspath(file_path),))
+            self._delete([row[0] for row in rows.fetchall()])
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            stats = {"entries": entries}
+            for kind, counts in self.counters.items():
+                total = counts["hits"] + counts["misses"]
+                stats[kind] = dict(counts, hit_rate=counts["hits"] / total if total else 0.0)
+            return stats
+
+    def close(self):
+        self._db.close()
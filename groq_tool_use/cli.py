@@ -0,0 +1,64 @@
+"""Command line entry point: the interactive REPL and --batch mode"""
+import argparse
+import os
+from typing import List
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Chat with Deepseek on Groq using file and CSV tools")
+    parser.add_argument("--batch", metavar="PROMPTS_JSONL",
+                        help="run every prompt in a JSONL file headlessly instead of starting the REPL")
+    parser.add_argument("--output", help="results JSONL for --batch (default: <input>.results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=8, help="sessions to run at once in --batch mode")
+    parser.add_argument("--id-field", default="id", help="JSON field holding each prompt's id")
+    parser.add_argument("--prompt-field", default="prompt", help="JSON field holding each prompt")
+    parser.add_argument("--no-resume", action="store_true", help="rerun prompts already in the output file")
+    parser.add_argument("--lazy-writes", action="store_true",
+                        help="write CSV edits back once per turn instead of after every edit")
+    args = parser.parse_args(argv)
+    # Imported after parsing so --help and argument errors answer immediately
+    import asyncio
+    from rich.panel import Panel
+    from .agent import GroqDeepseek
+    from .batch import env_options, run_batch
+    from .render import console
+
+    if args.batch:
+        output = args.output or f"{os.path.splitext(args.batch)[0]}.results.jsonl"
+        summary = asyncio.run(run_batch(args.batch, output, args.concurrency, args.id_field,
+                                        args.prompt_field, resume=not args.no_resume,
+                                        lazy_writes=args.lazy_writes))
+        console.print(f"[bold]{summary['ok']} ok, {summary['error']} failed, {summary['skipped']} already done[/] "
+                      f"in {summary['seconds']:.1f} s ({summary['sessions_per_minute']:.1f} sessions/min), "
+                      f"results in {output}")
+        return
+
+    chat = GroqDeepseek(lazy_writes=args.lazy_writes, **env_options())
+    console.print(Panel(
+        "[green]GroqDeepseek initialized! Using the Deepseek model with file read/write capabilities.[/]\n"
+        "Type '/stats' for session latencies or 'quit' to exit.",
+        title="[bold]GroqDeepseek[/]",
+        border_style="blue",
+        padding=(1, 2)
+    ))
+
+    try:
+        while True:
+            user_input = console.input("\n[bold green]You:[/] ").strip()
+
+            if user_input.lower() == 'quit':
+                console.print(Panel(
+                    "[yellow]Thank you for using GroqDeepseek! Goodbye![/]",
+                    border_style="yellow",
+                    padding=(1, 1)
+                ))
+                break
+
+            if user_input == '/stats':
+                chat.renderer.stats(chat.stats())
+                continue
+
+            response = chat.chat(user_input)
+    finally:
+        # Also on EOF, Ctrl-C or an error, so buffered appends reach the file
+        chat.close()
@@ -0,0 +1,748 @@
+"""CSV storage: parsed-frame cache, row index, append buffer, Arrow sidecars and aggregation"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Callable
+
+from .util import LazyModule, atomic_write
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+# The columnar sidecar cache is disabled without pyarrow
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+pa = LazyModule("pyarrow")
+feather = LazyModule("pyarrow.feather")
+
+
+class DataFrameCache:
+    """Shared cache of parsed CSV files keyed by path.
+
+    Entries are validated against the file's mtime and size on every access,
+    so edits made outside the tools are picked up. The least recently used
+    frames are evicted once the total in-memory footprint exceeds `max_bytes`.
+    Tools that change a cached frame call `mark_modified`; with `lazy=True`
+    the file is only rewritten on `flush` (or eviction) instead of every time.
+    If the file changes on disk while it has unflushed edits, the disk wins.
+    `loader` parses a file on a miss (`pd.read_csv` by default).
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, lazy: bool = False,
+                 loader: Callable[[str], pd.DataFrame] = None):
+        self.max_bytes = max_bytes
+        self.lazy = lazy
+        self.loader = loader or (lambda file_path: pd.read_csv(file_path))
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(file_path: str) -> str:
+        return os.path.abspath(file_path)
+
+    @staticmethod
+    def _stat(path: str):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _footprint(df: pd.DataFrame) -> int:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def get(self, file_path: str) -> pd.DataFrame:
+        """Return the cached frame for a CSV file, parsing it if needed.
+
+        The frame is shared: callers that change it must call `mark_modified`.
+        """
+        key = self._key(file_path)
+        fingerprint = self._stat(key)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                self.entries.move_to_end(key)
+                return entry["df"]
+
+        # Parse outside the lock so other files can be served meanwhile
+        df = self.loader(key)
+        with self._lock:
+            self._store(key, df, fingerprint, dirty=False)
+        return df
+
+    def _store(self, key: str, df: pd.DataFrame, fingerprint, dirty: bool):
+        self._discard(key)
+        nbytes = self._footprint(df)
+        self.entries[key] = {"df": df, "fingerprint": fingerprint, "nbytes": nbytes, "dirty": dirty}
+        self.total_bytes += nbytes
+        self._evict()
+
+    def _discard(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry["nbytes"]
+        return entry
+
+    def _evict(self):
+        # Always keep the most recently used frame, even if it alone is too big
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            key, entry = next(iter(self.entries.items()))
+            if entry["dirty"]:
+                self._write(key, entry)
+            self._discard(key)
+
+    def _write(self, key: str, entry: dict):
+        with atomic_write(key, newline="") as file:
+            entry["df"].to_csv(file, index=False)
+        entry["fingerprint"] = self._stat(key)
+        entry["dirty"] = False
+
+    def mark_modified(self, file_path: str, df: pd.DataFrame = None):
+        """Record an in-place change to a cached frame (or replace it with `df`)"""
+        key = self._key(file_path)
+        with self._lock:
+            entry = self.entries.get(key)
+            if df is not None:
+                fingerprint = entry["fingerprint"] if entry is not None else None
+                self._store(key, df, fingerprint, dirty=True)
+                entry = self.entries[key]
+            elif entry is None:
+                return
+            else:
+                self.total_bytes -= entry["nbytes"]
+                entry["nbytes"] = self._footprint(entry["df"])
+                self.total_bytes += entry["nbytes"]
+                entry["dirty"] = True
+                self.entries.move_to_end(key)
+            if not self.lazy:
+                self._write(key, entry)
+            self._evict()
+
+    def flush(self, file_path: str = None):
+        """Write unflushed edits back to disk, for one file or all of them"""
+        with self._lock:
+            keys = [self._key(file_path)] if file_path else list(self.entries)
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and entry["dirty"]:
+                    self._write(key, entry)
+
+    def invalidate(self, file_path: str):
+        """Drop a cached frame without writing it back"""
+        with self._lock:
+            self._discard(self._key(file_path))
+
+    def is_dirty(self, file_path: str) -> bool:
+        with self._lock:
+            entry = self.entries.get(self._key(file_path))
+            return entry is not None and entry["dirty"]
+
+    def peek(self, file_path: str):
+        """Return the cached frame if it is present and current, without parsing"""
+        key = self._key(file_path)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["fingerprint"] != self._stat(key):
+                return None
+            return entry["df"]
+
+    def touch(self, file_path: str):
+        """Accept the file's new mtime/size after a write the cached frame already reflects"""
+        key = self._key(file_path)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["fingerprint"] = self._stat(key)
+
+
+class CsvRowIndex:
+    """Byte offsets of the data rows in one CSV file.
+
+    A cell edit rewrites only the affected row: in place when the new row has
+    the same encoded length, otherwise the edited row is recorded in a journal
+    file next to the CSV (`<file>.journal`) and all journaled rows are applied
+    in a single streaming pass by `compact`. Readers of the file must call
+    `compact` first; row numbers match the pandas index (blank lines skipped).
+    """
+
+    BLOCK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, file_path: str):
+        self.path = os.path.abspath(file_path)
+        self.journal_path = self.path + ".journal"
+        self.header = []
+        self.starts = np.zeros(1, dtype=np.int64)
+        self.pending = {}
+        self._build()
+        self._load_journal()
+
+    @property
+    def fingerprint(self):
+        return self._fingerprint
+
+    def _refresh_fingerprint(self):
+        stat = os.stat(self.path)
+        self._fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def _build(self):
+        with open(self.path, "rb") as file:
+            header_record = self._read_record(file)
+            self.header = next(csv.reader([header_record.decode("utf-8-sig")]), [])
+            first = file.tell()
+            size = os.fstat(file.fileno()).st_size
+            starts = self._scan_unquoted(file, first, size)
+            if starts is None:
+                file.seek(first)
+                starts = self._scan_quoted(file, first)
+        self.starts = np.append(np.asarray(starts, dtype=np.int64), size)
+        self._refresh_fingerprint()
+
+    @staticmethod
+    def _read_record(file) -> bytes:
+        """Read one record, following quoted fields across line breaks"""
+        record = b""
+        for line in file:
+            record += line
+            if record.count(b'"') % 2 == 0:
+                break
+        return record
+
+    def _scan_unquoted(self, file, first: int, size: int):
+        """Find row starts with a vectorised newline scan; None if the file uses quotes"""
+        starts, firsts, position = [np.array([first], dtype=np.int64)], [], first
+        # A line starts exactly at the beginning of the next block
+        line_at_block_start = True
+        while True:
+            block = file.read(self.BLOCK_SIZE)
+            if not block:
+                break
+            if b'"' in block:
+                return None
+            data = np.frombuffer(block, dtype=np.uint8)
+            newlines = np.flatnonzero(data == 10)
+            starts.append(newlines.astype(np.int64) + position + 1)
+            if line_at_block_start:
+                firsts.append(data[:1])
+            firsts.append(data[newlines[newlines + 1 < len(block)] + 1])
+            line_at_block_start = bool(len(newlines)) and newlines[-1] == len(block) - 1
+            position += len(block)
+        starts = np.concatenate(starts)
+        starts = starts[starts < size]
+        # Drop blank and whitespace-only lines so row numbers line up with pandas.
+        # Only a line that starts with whitespace can be one.
+        firsts = np.concatenate(firsts) if firsts else np.zeros(0, dtype=np.uint8)
+        candidates = np.flatnonzero(np.isin(firsts, list(b" \t\n\r\x0b\x0c")))
+        if len(candidates):
+            lengths = np.diff(np.append(starts, size))
+            blank = np.zeros(len(starts), dtype=bool)
+            for row in candidates:
+                file.seek(int(starts[row]))
+                blank[row] = file.read(int(lengths[row])).strip() == b""
+            starts = starts[~blank]
+        return starts
+
+    @staticmethod
+    def _scan_quoted(file, first: int) -> List[int]:
+        starts, position, record_start, quotes = [], first, None, 0
+        for line in file:
+            if record_start is None:
+                if not line.strip():
+                    position += len(line)
+                    continue
+                record_start = position
+            quotes += line.count(b'"')
+            position += len(line)
+            if quotes % 2 == 0:
+                starts.append(record_start)
+                record_start, quotes = None, 0
+        if record_start is not None:
+            starts.append(record_start)
+        return starts
+
+    def _raw_row(self, row: int) -> bytes:
+        with open(self.path, "rb") as file:
+            file.seek(int(self.starts[row]))
+            return file.read(int(self.starts[row + 1] - self.starts[row]))
+
+    @staticmethod
+    def _terminator(raw: bytes) -> bytes:
+        if raw.endswith(b"\r\n"):
+            return b"\r\n"
+        return b"\n" if raw.endswith(b"\n") else b""
+
+    @staticmethod
+    def _encode(values: List[str], terminator: bytes) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="").writerow(values)
+        return buffer.getvalue().encode("utf-8") + terminator
+
+    def row_values(self, row: int) -> List[str]:
+        if row in self.pending:
+            return list(self.pending[row])
+        raw = self._raw_row(row).decode("utf-8")
+        return next(csv.reader(io.StringIO(raw)), [])
+
+    def column_position(self, column_name: str) -> int:
+        if column_name not in self.header:
+            raise KeyError(column_name)
+        return self.header.index(column_name)
+
+    def update(self, edits: List[tuple], journal: bool = True):
+        """Apply (row, column_name, value) edits; callers validate them first"""
+        rows = {}
+        for row, column_name, value in edits:
+            values = rows.get(row) or self.row_values(row)
+            values[self.column_position(column_name)] = "" if value is None else str(value)
+            rows[row] = values
+
+        journaled = {}
+        for row, values in rows.items():
+            raw = self._raw_row(row)
+            encoded = self._encode(values, self._terminator(raw))
+            if row not in self.pending and len(encoded) == len(raw):
+                with open(self.path, "r+b") as file:
+                    file.seek(int(self.starts[row]))
+                    file.write(encoded)
+            else:
+                journaled[row] = values
+
+        if journaled:
+            self.pending.update(journaled)
+            if journal:
+                self._append_journal(journaled)
+        self._refresh_fingerprint()
+
+    def _append_journal(self, rows: Dict[int, List[str]]):
+        new_journal = not os.path.exists(self.journal_path)
+        with open(self.journal_path, "a") as file:
+            if new_journal:
+                # The size guards against replaying onto a file that changed
+                file.write(json.dumps({"size": self._fingerprint[1]}) + "\n")
+            for row, values in rows.items():
+                file.write(json.dumps({"row": row, "values": values}) + "\n")
+
+    def _load_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path) as file:
+            lines = [json.loads(line) for line in file if line.strip()]
+        if lines and lines[0].get("size") == self._fingerprint[1]:
+            for entry in lines[1:]:
+                if entry["row"] < len(self):
+                    self.pending[entry["row"]] = entry["values"]
+        else:
+            os.remove(self.journal_path)
+
+    def compact(self):
+        """Write all journaled rows into the file in one streaming pass"""
+        if not self.pending:
+            return
+        temp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        shifts = np.zeros(len(self.starts), dtype=np.int64)
+        position = 0
+        with open(self.path, "rb") as source, open(temp_path, "wb") as target:
+            for row in sorted(self.pending):
+                start, end = int(self.starts[row]), int(self.starts[row + 1])
+                self._copy_range(source, target, position, start)
+                raw = source.read(end - start)
+                encoded = self._encode(self.pending[row], self._terminator(raw))
+                target.write(encoded)
+                shifts[row + 1] = len(encoded) - len(raw)
+                position = end
+            self._copy_range(source, target, position, int(self.starts[-1]))
+        starts = self.starts + np.cumsum(shifts)
+        os.replace(temp_path, self.path)
+        self.starts = starts
+        self.pending = {}
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._refresh_fingerprint()
+
+    @staticmethod
+    def _copy_range(source, target, start: int, end: int, block: int = 1024 * 1024):
+        source.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = source.read(min(block, remaining))
+            if not data:
+                break
+            target.write(data)
+            remaining -= len(data)
+
+
+class CsvRowStore:
+    """Row indexes for the CSV files touched by the tools, rebuilt when a file changes"""
+
+    def __init__(self, compact_after: int = 256):
+        self.compact_after = compact_after
+        self.indexes = {}
+        self._lock = threading.RLock()
+
+    def index(self, file_path: str) -> CsvRowIndex:
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+        index = self.indexes.get(key)
+        if index is None or index.fingerprint != (stat.st_mtime_ns, stat.st_size):
+            index = self.indexes[key] = CsvRowIndex(key)
+        return index
+
+    def update_cells(self, file_path: str, edits: List[tuple]) -> CsvRowIndex:
+        """Validate and apply (row, column_name, value) edits to one file.
+
+        A single edit is journaled; a batch is applied in one compaction pass.
+        Raises IndexError or KeyError for a bad row or column.
+        """
+        with self._lock:
+            index = self.index(file_path)
+            for row, column_name, value in edits:
+                if row < 0 or row >= len(index):
+                    raise IndexError(f"Row index {row} out of bounds")
+                if column_name not in index.header:
+                    raise KeyError(f"Column '{column_name}' not found")
+            index.update(edits, journal=len(edits) == 1)
+            if len(edits) > 1 or len(index.pending) >= self.compact_after:
+                index.compact()
+            return index
+
+    def compact(self, file_path: str = None) -> bool:
+        """Apply journaled edits; returns True if a file was rewritten"""
+        with self._lock:
+            if file_path is None:
+                keys = list(self.indexes)
+            else:
+                keys = [os.path.abspath(file_path)]
+                if keys[0] not in self.indexes and os.path.exists(keys[0] + ".journal"):
+                    # Edits journaled by an earlier process
+                    self.index(keys[0])
+            rewritten = False
+            for key in keys:
+                index = self.indexes.get(key)
+                if index is not None and index.pending:
+                    index.compact()
+                    rewritten = True
+            return rewritten
+
+    def invalidate(self, file_path: str):
+        """Forget a file's index and any journaled edits (the file is being replaced)"""
+        with self._lock:
+            key = os.path.abspath(file_path)
+            self.indexes.pop(key, None)
+            if os.path.exists(key + ".journal"):
+                os.remove(key + ".journal")
+
+
+class CsvAppendBuffer:
+    """Write-behind buffer for rows appended to CSV files.
+
+    Rows are checked against the file's header and held in memory, then
+    written in one append (and one fsync) per file when `max_rows` or
+    `max_bytes` is reached, or when the owner calls `write` before the file
+    is read, edited or closed. Rows use the line terminator of the header.
+    """
+
+    def __init__(self, max_rows: int = 10_000, max_bytes: int = 4 * 1024 * 1024):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.pending = {}
+        self.headers = {}
+        self._lock = threading.RLock()
+
+    def header(self, file_path: str):
+        """Return the (columns, line terminator) of a CSV file, cached by mtime and size"""
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+        fingerprint = (stat.st_mtime_ns, stat.st_size)
+        cached = self.headers.get(key)
+        if cached is None or cached[0] != fingerprint:
+            with open(key, "rb") as file:
+                record = CsvRowIndex._read_record(file)
+            columns = next(csv.reader([record.decode("utf-8-sig")]), [])
+            terminator = CsvRowIndex._terminator(record).decode() or "\r\n"
+            cached = self.headers[key] = (fingerprint, columns, terminator)
+        return cached[1], cached[2]
+
+    def append(self, file_path: str, rows: List[list]) -> bool:
+        """Buffer rows for a file; returns True once the file's buffer should be written.
+
+        Raises ValueError (buffering nothing) if a row does not match the header width.
+        """
+        with self._lock:
+            key = os.path.abspath(file_path)
+            columns, terminator = self.header(key)
+            for number, row in enumerate(rows):
+                if columns and len(row) != len(columns):
+                    raise ValueError(f"Row {number} has {len(row)} values but the CSV has "
+                                     f"{len(columns)} columns ({', '.join(columns)})")
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator=terminator).writerows(rows)
+            entry = self.pending.setdefault(key, {"chunks": [], "rows": 0, "bytes": 0})
+            text = buffer.getvalue()
+            entry["chunks"].append(text)
+            entry["rows"] += len(rows)
+            entry["bytes"] += len(text)
+            return entry["rows"] >= self.max_rows or entry["bytes"] >= self.max_bytes
+
+    def paths(self, file_path: str = None) -> List[str]:
+        """Files with buffered rows (only `file_path` itself if given)"""
+        with self._lock:
+            if file_path is None:
+                return list(self.pending)
+            key = os.path.abspath(file_path)
+            return [key] if key in self.pending else []
+
+    def write(self, file_path: str):
+        """Append a file's buffered rows in one write; returns the size before the append"""
+        with self._lock:
+            key = os.path.abspath(file_path)
+            entry = self.pending.pop(key, None)
+            if entry is None:
+                return None
+            _, terminator = self.header(key)
+            data = "".join(entry["chunks"]).encode("utf-8")
+            with open(key, "rb") as file:
+                previous_size = file.seek(0, os.SEEK_END)
+                if previous_size:
+                    file.seek(previous_size - 1)
+                    if file.read(1) != b"\n":
+                        # Don't glue the first row onto an unterminated last line
+                        data = terminator.encode() + data
+            with open(key, "ab") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            return previous_size
+
+    def discard(self, file_path: str):
+        """Drop buffered rows for a file that is being replaced"""
+        with self._lock:
+            key = os.path.abspath(file_path)
+            self.pending.pop(key, None)
+            self.headers.pop(key, None)
+
+
+class CsvSidecar:
+    """Memory-mapped Arrow copies of large CSV files.
+
+    The first parse of a CSV of at least `min_bytes` also writes the frame to
+    an uncompressed Feather file in a hidden `.<name>.sidecar` directory next
+    to it; later cold loads memory-map that file instead of parsing text. A
+    sidecar is valid while the CSV's mtime and size match its metadata, or
+    (after a touch or copy) while the content hash still matches. Appends add
+    a new part file instead of rebuilding. Without pyarrow this is a plain
+    `pd.read_csv`.
+    """
+
+    HASH_BLOCK = 4 * 1024 * 1024
+
+    def __init__(self, min_bytes: int = 8 * 1024 * 1024):
+        self.min_bytes = min_bytes
+        self.enabled = HAS_PYARROW
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def directory(file_path: str) -> str:
+        path = os.path.abspath(file_path)
+        return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.sidecar")
+
+    def _meta_path(self, file_path: str) -> str:
+        return os.path.join(self.directory(file_path), "meta.json")
+
+    def _read_meta(self, file_path: str):
+        try:
+            with open(self._meta_path(file_path)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, file_path: str, meta: dict):
+        temp_path = self._meta_path(file_path) + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(temp_path, self._meta_path(file_path))
+
+    @classmethod
+    def _hash_range(cls, file, start: int, end: int, previous: str = "") -> str:
+        """Hash bytes [start, end) chained onto the hash of everything before"""
+        digest = hashlib.blake2b(previous.encode(), digest_size=16)
+        file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = file.read(min(cls.HASH_BLOCK, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+        return digest.hexdigest()
+
+    def _content_hash(self, file_path: str, segments: List[int]) -> str:
+        """Recompute the chained hash over the segment boundaries recorded at write time"""
+        digest, start = "", 0
+        with open(file_path, "rb") as file:
+            for end in segments:
+                digest = self._hash_range(file, start, end, digest)
+                start = end
+        return digest
+
+    def is_current(self, file_path: str, meta: dict = None) -> bool:
+        meta = meta or self._read_meta(file_path)
+        if meta is None:
+            return False
+        stat = os.stat(file_path)
+        if stat.st_size != meta["size"]:
+            return False
+        if stat.st_mtime_ns == meta["mtime_ns"]:
+            return True
+        if self._content_hash(file_path, meta["segments"]) != meta["hash"]:
+            return False
+        meta["mtime_ns"] = stat.st_mtime_ns
+        self._write_meta(file_path, meta)
+        return True
+
+    def load(self, file_path: str) -> pd.DataFrame:
+        """Load a CSV as a DataFrame, preferring (and building) its sidecar"""
+        if not self.enabled or os.path.getsize(file_path) < self.min_bytes:
+            return pd.read_csv(file_path)
+        with self._lock:
+            meta = self._read_meta(file_path)
+            if meta is not None and self.is_current(file_path, meta):
+                try:
+                    tables = [
+                        feather.read_table(os.path.join(self.directory(file_path), part), memory_map=True)
+                        for part in meta["parts"]
+                    ]
+                    return pa.concat_tables(tables).to_pandas()
+                except (OSError, pa.ArrowException):
+                    self.invalidate(file_path)
+        df = pd.read_csv(file_path)
+        self.write(file_path, df)
+        return df
+
+    def write(self, file_path: str, df: pd.DataFrame):
+        """Replace the sidecar with the contents of `df` (parsed from the current file)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.invalidate(file_path)
+            try:
+                stat = os.stat(file_path)
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                os.makedirs(self.directory(file_path), exist_ok=True)
+                feather.write_feather(table, os.path.join(self.directory(file_path), "part-00000.arrow"),
+                                      compression="uncompressed")
+                with open(file_path, "rb") as file:
+                    digest = self._hash_range(file, 0, stat.st_size)
+                self._write_meta(file_path, {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "segments": [stat.st_size],
+                    "hash": digest,
+                    "parts": ["part-00000.arrow"],
+                })
+            except (OSError, pa.ArrowException, TypeError, ValueError):
+                # Columns that Arrow cannot represent simply go without a sidecar
+                self.invalidate(file_path)
+
+    def extend(self, file_path: str, previous_size: int):
+        """Add the rows appended after `previous_size` bytes as a new part file.
+
+        Only valid when the sidecar was current before the append; a schema
+        mismatch (e.g. text appended to a numeric column) drops the sidecar.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            meta = self._read_meta(file_path)
+            if meta is None or meta["size"] != previous_size:
+                return
+            try:
+                stat = os.stat(file_path)
+                directory = self.directory(file_path)
+                schema = feather.read_table(os.path.join(directory, meta["parts"][0]), memory_map=True).schema
+                with open(file_path, "rb") as file:
+                    file.seek(previous_size)
+                    appended = file.read(stat.st_size - previous_size)
+                    digest = self._hash_range(file, previous_size, stat.st_size, meta["hash"])
+                rows = pd.read_csv(io.BytesIO(appended), header=None, names=schema.names)
+                table = pa.Table.from_pandas(rows, preserve_index=False).cast(schema)
+                part = f"part-{len(meta['parts']):05d}.arrow"
+                feather.write_feather(table, os.path.join(directory, part), compression="uncompressed")
+                meta["parts"].append(part)
+                meta["segments"].append(stat.st_size)
+                meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size, hash=digest)
+                self._write_meta(file_path, meta)
+            except (OSError, pa.ArrowException, TypeError, ValueError, pd.errors.ParserError):
+                self.invalidate(file_path)
+
+    def invalidate(self, file_path: str):
+        with self._lock:
+            shutil.rmtree(self.directory(file_path), ignore_errors=True)
+
+
+AGGREGATIONS = ("count", "sum", "mean", "min", "max")
+
+
+class QueryAggregator:
+    """Single-pass count/sum/mean/min/max over DataFrame chunks, optionally grouped.
+
+    Only per-group partial sums, counts, minima and maxima are kept between
+    chunks, so memory grows with the number of groups, not rows.
+    """
+
+    # Partial statistics each aggregation needs, and how partials combine
+    NEEDS = {"count": ["count"], "sum": ["sum"], "mean": ["sum", "count"], "min": ["min"], "max": ["max"]}
+    COMBINE = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+    def __init__(self, aggregate: Dict[str, str], group_by: str = None):
+        self.aggregate = {}
+        for column, functions in aggregate.items():
+            functions = [functions] if isinstance(functions, str) else list(functions)
+            for function in functions:
+                if function not in AGGREGATIONS:
+                    raise ValueError(f"Unsupported aggregation '{function}', use one of {', '.join(AGGREGATIONS)}")
+            self.aggregate[column] = functions
+        self.group_by = group_by
+        self.spec = {
+            column: sorted({stat for function in functions for stat in self.NEEDS[function]})
+            for column, functions in self.aggregate.items()
+        }
+        self.partial = None
+
+    def add(self, chunk: pd.DataFrame):
+        if chunk.empty:
+            return
+        keys = chunk[self.group_by] if self.group_by else pd.Series(0, index=chunk.index)
+        stats = chunk[list(self.spec)].groupby(keys, dropna=False).agg(self.spec)
+        if self.partial is not None:
+            combine = {key: self.COMBINE[key[1]] for key in stats.columns}
+            stats = pd.concat([self.partial, stats]).groupby(level=0, dropna=False).agg(combine)
+        self.partial = stats
+
+    def result(self) -> pd.DataFrame:
+        if self.partial is None and self.group_by:
+            # No rows matched, so there are no groups
+            columns = [f"{column}_{function}" for column, functions in self.aggregate.items()
+                       for function in functions]
+            return pd.DataFrame(columns=[self.group_by] + columns)
+        output = {}
+        for column, functions in self.aggregate.items():
+            for function in functions:
+                if self.partial is None:
+                    output[f"{column}_{function}"] = [0 if function == "count" else None]
+                elif function == "mean":
+                    output[f"{column}_mean"] = self.partial[(column, "sum")] / self.partial[(column, "count")]
+                else:
+                    output[f"{column}_{function}"] = self.partial[(column, function)]
+        result = pd.DataFrame(output)
+        if self.group_by:
+            result.index.name = self.group_by
+            return result.reset_index()
+        return result.reset_index(drop=True)
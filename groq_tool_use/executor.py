@@ -0,0 +1,127 @@
+"""Concurrent tool execution on thread and process pools"""
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Callable
+
+from .registry import TOOLS, ToolRegistry
+from .tracing import trace_span
+from .util import dumps, estimate_tokens
+
+
+_process_tools = None
+
+
+def _init_process(factory: Callable):
+    """Process pool initializer: build the worker's tool instance once"""
+    global _process_tools
+    _process_tools = factory()
+
+
+def _run_tool_in_process(function_name: str, function_args: dict) -> str:
+    """Process pool entry point: run a tool without the parent's client or state"""
+    return _process_tools.execute_tool(function_name, function_args)
+
+
+class ToolExecutor:
+    """Run a batch of tool calls concurrently on a bounded pool.
+
+    Calls that touch a `file_path` written by another call in the same batch
+    are chained and run in their original order; everything else runs in
+    parallel. Results always come back in the order of the input calls.
+    """
+
+    def __init__(self, dispatch: Callable[[str, dict], str], max_workers: int = 4,
+                 use_process_pool: bool = False, raw_bytes: Callable[[], int] = None,
+                 registry: ToolRegistry = None, process_factory: Callable = None):
+        self.dispatch = dispatch
+        self.registry = registry or TOOLS
+        self.raw_bytes = raw_bytes
+        self.max_workers = max_workers
+        self.use_process_pool = use_process_pool
+        # Picklable callable that builds the object whose execute_tool runs in each worker
+        self.process_factory = process_factory
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._processes = None
+
+    def _process_pool(self):
+        if self._processes is None:
+            if self.process_factory is None:
+                raise ValueError("use_process_pool needs a process_factory")
+            self._processes = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_process,
+                                                  initargs=(self.process_factory,))
+        return self._processes
+
+    def _run_one(self, call: dict) -> dict:
+        with trace_span("tool", tool=call["name"]) as span:
+            start = time.perf_counter()
+            try:
+                if self.use_process_pool and self.registry.has_flag(call["name"], "process_pool"):
+                    content = self._process_pool().submit(
+                        _run_tool_in_process, call["name"], call["args"]).result()
+                else:
+                    content = self.dispatch(call["name"], call["args"])
+            except Exception as e:
+                content = dumps({"error": f"Error executing {call['name']}: {str(e)}"})
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            size = len(content.encode())
+            # Only results shaped in this thread know their unshaped size
+            raw_bytes = self.raw_bytes() if self.raw_bytes else 0
+            saved_bytes = max(raw_bytes - size, 0)
+            span.set(result_bytes=size, saved_bytes=saved_bytes, error=content.startswith('{"error"'))
+        return {
+            "tool_call_id": call["id"],
+            "name": call["name"],
+            "content": content,
+            "elapsed_ms": elapsed_ms,
+            "bytes": size,
+            "tokens": estimate_tokens(content),
+            "saved_bytes": saved_bytes,
+            "saved_tokens": (saved_bytes + 3) // 4,
+        }
+
+    def _run_chain(self, calls: List[dict]) -> List[dict]:
+        return [self._run_one(call) for call in calls]
+
+    @staticmethod
+    def _path(call: dict):
+        """The call's file as the stores key it, so "a.csv" and "./a.csv" are one file"""
+        path = call["args"].get("file_path")
+        return os.path.abspath(path) if isinstance(path, str) else None
+
+    def plan(self, calls: List[dict]) -> List[List[dict]]:
+        """Group calls into chains that must run sequentially"""
+        written = {self._path(call) for call in calls if self.registry.has_flag(call["name"], "writes")}
+        written.discard(None)
+        chains, by_path = [], {}
+        for call in calls:
+            path = self._path(call)
+            if path in written:
+                if path not in by_path:
+                    by_path[path] = []
+                    chains.append(by_path[path])
+                by_path[path].append(call)
+            else:
+                chains.append([call])
+        return chains
+
+    def run(self, calls: List[dict]) -> List[dict]:
+        """Execute calls (dicts with id, name, args) and return results in input order"""
+        chains = self.plan(calls)
+        if len(chains) == 1:
+            results = self._run_chain(chains[0])
+        else:
+            # Each chain gets a copy of the caller's context so its spans nest under the turn
+            futures = [self._threads.submit(contextvars.copy_context().run, self._run_chain, chain)
+                       for chain in chains]
+            results = [result for future in futures for result in future.result()]
+        order = {call["id"]: i for i, call in enumerate(calls)}
+        return sorted(results, key=lambda result: order[result["tool_call_id"]])
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False)
+        if self._processes is not None:
+            # Nothing is outstanding by now; not waiting lets the exit handler race the workers
+            self._processes.shutdown(wait=True)
+            self._processes = None
@@ -0,0 +1,229 @@
+"""Range reads, tail and pattern search over memory-mapped text files"""
+import mmap
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class LineIndex:
+    """Sparse line-offset index for one version of a file.
+
+    `newlines[k]` is the number of newlines before byte `k * BLOCK_SIZE`, so
+    the start of a line is one bisect plus a scan of at most one block. The
+    index is built lazily, only as far into the file as reads have needed,
+    and costs 8 bytes per block (1 MB for a 2 GB file).
+    """
+
+    BLOCK_SIZE = 16 * 1024
+
+    def __init__(self, fingerprint: tuple):
+        self.fingerprint = fingerprint
+        self.size = fingerprint[-1]
+        self.newlines = array("q", [0])
+        # Newlines in the whole file, once it has been indexed to the end
+        self.total = 0 if not self.size else None
+        self.ends_with_newline = True
+        self._lock = threading.Lock()
+
+    def _extend(self, mm, newline: int = None, position: int = None):
+        """Index blocks until `newline` newlines or byte `position` are covered"""
+        with self._lock:
+            while self.total is None:
+                if newline is not None and self.newlines[-1] >= newline:
+                    break
+                if position is not None and (len(self.newlines) - 1) * self.BLOCK_SIZE > position:
+                    break
+                start = (len(self.newlines) - 1) * self.BLOCK_SIZE
+                end = min(start + self.BLOCK_SIZE, self.size)
+                count = self.newlines[-1] + mm[start:end].count(b"\n")
+                if end == self.size:
+                    self.total = count
+                    self.ends_with_newline = mm[end - 1:end] == b"\n"
+                else:
+                    self.newlines.append(count)
+
+    def line_start(self, mm, line: int):
+        """Byte offset where 0-based `line` starts, or None past the end of the file"""
+        if line == 0:
+            return 0 if self.size else None
+        self._extend(mm, newline=line)
+        if self.total is not None and self.total < line:
+            return None
+        block = bisect_left(self.newlines, line) - 1
+        position = block * self.BLOCK_SIZE
+        for _ in range(line - self.newlines[block]):
+            position = mm.find(b"\n", position) + 1
+        return position if position < self.size else None
+
+    def line_number(self, mm, position: int) -> int:
+        """0-based number of the line containing byte `position`"""
+        self._extend(mm, position=position)
+        block = position // self.BLOCK_SIZE
+        return self.newlines[block] + mm[block * self.BLOCK_SIZE:position].count(b"\n")
+
+    def total_lines(self):
+        """Line count once the whole file is indexed, else None"""
+        if self.total is None:
+            return None
+        return self.total + (0 if self.ends_with_newline else 1)
+
+
+class FileReader:
+    """Bounded reads of text files of any size, for the read_file tool.
+
+    Files are memory-mapped per call, so a read touches only the pages it
+    returns and memory use does not depend on the file size. Line ranges use
+    a cached LineIndex per file that is rebuilt when the file's inode, mtime
+    or size changes. Every read stops after `max_bytes` and says where to
+    continue (`next_line` or `next_byte`). Text is decoded as UTF-8; bytes
+    that do not decode, e.g. a character cut by a byte range, become U+FFFD.
+    """
+
+    # Matched lines longer than this are cut in pattern search results
+    MAX_LINE_CHARS = 500
+
+    def __init__(self, max_files: int = 64):
+        self.max_files = max_files
+        self.indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _open(self, file_path: str):
+        """Yield (mmap or None for an empty file, LineIndex) for the current version of a file"""
+        key = os.path.abspath(file_path)
+        with open(key, "rb") as file:
+            stat = os.fstat(file.fileno())
+            fingerprint = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            with self._lock:
+                index = self.indexes.get(key)
+                if index is None or index.fingerprint != fingerprint:
+                    index = self.indexes[key] = LineIndex(fingerprint)
+                self.indexes.move_to_end(key)
+                while len(self.indexes) > self.max_files:
+                    self.indexes.popitem(last=False)
+            if not stat.st_size:
+                yield None, index
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm, index
+
+    def invalidate(self, file_path: str):
+        with self._lock:
+            self.indexes.pop(os.path.abspath(file_path), None)
+
+    @staticmethod
+    def _decode(data: bytes) -> str:
+        return data.decode("utf-8", errors="replace")
+
+    def lines(self, file_path: str, start_line: int = 1, end_line: int = None, max_bytes: int = 8192) -> dict:
+        """Lines `start_line` to `end_line` (1-based, inclusive), up to `max_bytes`"""
+        if start_line < 1 or (end_line is not None and end_line < start_line):
+            raise ValueError("start_line must be at least 1 and end_line at least start_line")
+        with self._open(file_path) as (mm, index):
+            start = index.line_start(mm, start_line - 1) if mm is not None else None
+            result = {"start_line": start_line, "size": index.size}
+            if start is None:
+                result.update(content="", end_line=start_line - 1)
+            else:
+                limit = min(start + max_bytes, index.size)
+                position, line = start, start_line
+                while position < index.size and (end_line is None or line <= end_line):
+                    newline = mm.find(b"\n", position, limit)
+                    if newline < 0:
+                        if limit == index.size:
+                            # The last line, without a final newline
+                            position, line = index.size, line + 1
+                        break
+                    position, line = newline + 1, line + 1
+                if line == start_line:
+                    # One line longer than max_bytes: return its start, continue by bytes
+                    result.update(content=self._decode(mm[start:limit]), end_line=start_line,
+                                  truncated=True, next_byte=limit)
+                else:
+                    result.update(content=self._decode(mm[start:position]), end_line=line - 1)
+                    if position < index.size and (end_line is None or line <= end_line):
+                        result.update(truncated=True, next_line=line)
+            total = index.total_lines()
+            if total is not None:
+                result["total_lines"] = total
+            return result
+
+    def byte_range(self, file_path: str, start_byte: int = 0, end_byte: int = None, max_bytes: int = 8192) -> dict:
+        """Bytes `start_byte` up to (not including) `end_byte`, at most `max_bytes` of them"""
+        if start_byte < 0 or (end_byte is not None and end_byte < start_byte):
+            raise ValueError("start_byte must be at least 0 and end_byte at least start_byte")
+        with self._open(file_path) as (mm, index):
+            end = index.size if end_byte is None else min(end_byte, index.size)
+            stop = min(end, start_byte + max_bytes)
+            content = self._decode(mm[start_byte:stop]) if mm is not None and start_byte < stop else ""
+            result = {"content": content, "start_byte": start_byte, "end_byte": max(stop, start_byte),
+                      "size": index.size}
+            if stop < end:
+                result.update(truncated=True, next_byte=stop)
+            return result
+
+    def tail(self, file_path: str, lines: int = 20, max_bytes: int = 8192) -> dict:
+        """The last `lines` lines, read backwards from the end without indexing the file"""
+        if lines < 1:
+            raise ValueError("tail must be at least 1")
+        with self._open(file_path) as (mm, index):
+            if mm is None:
+                return {"content": "", "lines": 0, "start_byte": 0, "size": 0}
+            floor = max(index.size - max_bytes, 0)
+            # A final newline ends the last line rather than starting an empty one
+            position = index.size - 1 if mm[-1:] == b"\n" else index.size
+            count, truncated = 0, False
+            while count < lines:
+                newline = mm.rfind(b"\n", floor, position)
+                if newline < 0:
+                    break
+                position, count = newline, count + 1
+            if count == lines:
+                start = position + 1
+            elif floor == 0:
+                # Everything before the first newline is the first line
+                start, count = 0, count + 1
+            else:
+                start, truncated = (position + 1 if count else floor), True
+                count = max(count, 1)
+            result = {"content": self._decode(mm[start:]), "lines": count, "start_byte": start,
+                      "size": index.size}
+            if truncated:
+                result["truncated"] = True
+            total = index.total_lines()
+            if total is not None:
+                result["start_line"] = total - count + 1
+            return result
+
+    def search(self, file_path: str, pattern: str, start_line: int = 1, max_matches: int = 100,
+               ignore_case: bool = False, max_bytes: int = 8192) -> dict:
+        """Lines matching a regular expression, as [line number, text] pairs, from `start_line`"""
+        if start_line < 1:
+            raise ValueError("start_line must be at least 1")
+        regex = re.compile(pattern.encode(), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        with self._open(file_path) as (mm, index):
+            result = {"pattern": pattern, "matches": [], "size": index.size}
+            position = index.line_start(mm, start_line - 1) if mm is not None else None
+            used = 0
+            while position is not None and position < index.size:
+                match = regex.search(mm, position)
+                if match is None:
+                    break
+                line_start = mm.rfind(b"\n", 0, match.start()) + 1
+                line_end = mm.find(b"\n", match.start())
+                line_end = index.size if line_end < 0 else line_end
+                line = index.line_number(mm, line_start) + 1
+                if len(result["matches"]) >= max_matches or used >= max_bytes:
+                    result.update(truncated=True, next_line=line)
+                    break
+                text = self._decode(mm[line_start:min(line_end, line_start + self.MAX_LINE_CHARS * 4)])
+                if len(text) > self.MAX_LINE_CHARS:
+                    text = text[:self.MAX_LINE_CHARS] + "..."
+                result["matches"].append([line, text])
+                used += len(text) + 8
+                position = line_end + 1
+            return result
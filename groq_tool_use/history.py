@@ -0,0 +1,123 @@
+"""Conversation history with prompt-size accounting and trimming"""
+import re
+import uuid
+from typing import List
+
+from .util import dumps, estimate_tokens
+
+
+class HistoryPolicy:
+    """How ConversationHistory keeps the prompt small.
+
+    - `max_prompt_tokens`: oldest whole turns are dropped beyond this
+    - `keep_recent_turns`: turns (a user message and everything after it)
+      that are never elided
+    - `max_old_tool_tokens`: older tool results above this are replaced
+      by a short stub
+    - `strip_reasoning`: remove <think> blocks from assistant messages
+    """
+
+    def __init__(self, max_prompt_tokens: int = 24000, keep_recent_turns: int = 2,
+                 max_old_tool_tokens: int = 200, strip_reasoning: bool = True):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_old_tool_tokens = max_old_tool_tokens
+        self.strip_reasoning = strip_reasoning
+
+
+class ConversationHistory(list):
+    """Chat messages with approximate token counts and policy-driven compaction.
+
+    `compact` is run before every request. Tool results are stubbed rather
+    than removed and turns are dropped whole, so every assistant tool call
+    keeps its matching tool messages. `prompt_sizes` records the size of
+    each prompt sent.
+    """
+
+    THINK_PATTERN = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+    def __init__(self, messages: List[dict] = (), policy: HistoryPolicy = None):
+        super().__init__(messages)
+        self.policy = policy or HistoryPolicy()
+        self.prompt_sizes = []
+        self._tokens = {}
+
+    def message_tokens(self, message: dict) -> int:
+        """Approximate tokens for one message, cached until the message is replaced"""
+        cached = self._tokens.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+        tokens = 4 + estimate_tokens(message.get("content") or "")
+        for tool_call in message.get("tool_calls") or []:
+            tokens += estimate_tokens(tool_call["function"]["name"] + tool_call["function"]["arguments"])
+        self._tokens[id(message)] = (message, tokens)
+        return tokens
+
+    def total_tokens(self) -> int:
+        return sum(self.message_tokens(message) for message in self)
+
+    def _turn_starts(self) -> List[int]:
+        return [index for index, message in enumerate(self) if message["role"] == "user"]
+
+    def _replace(self, index: int, message: dict):
+        self._tokens.pop(id(self[index]), None)
+        self[index] = message
+
+    def compact(self):
+        policy = self.policy
+        starts = self._turn_starts()
+        # Messages before index `recent` belong to turns old enough to elide
+        if policy.keep_recent_turns <= 0:
+            recent = len(self)
+        elif len(starts) >= policy.keep_recent_turns:
+            recent = starts[-policy.keep_recent_turns]
+        else:
+            recent = 0
+
+        for index, message in enumerate(self):
+            content = message.get("content") or ""
+            if policy.strip_reasoning and message["role"] == "assistant" and "<think>" in content:
+                self._replace(index, dict(message, content=self.THINK_PATTERN.sub("", content).strip()))
+            elif (index < recent and message["role"] == "tool"
+                  and self.message_tokens(message) > policy.max_old_tool_tokens):
+                self._replace(index, dict(message, content=dumps({
+                    "elided": "Tool result removed from history to save context; call the tool again if needed",
+                    "tokens": self.message_tokens(message),
+                    "head": content[:policy.max_old_tool_tokens * 2]
+                })))
+
+        # Drop the oldest turns (never the current one) until the prompt fits
+        while self.total_tokens() > policy.max_prompt_tokens:
+            starts = self._turn_starts()
+            if len(starts) < 2:
+                break
+            for message in self[starts[0]:starts[1]]:
+                self._tokens.pop(id(message), None)
+            del self[starts[0]:starts[1]]
+
+    def record_prompt(self, extra_tokens: int = 0) -> int:
+        """Record the size of the prompt about to be sent (plus e.g. tool schemas)"""
+        tokens = self.total_tokens() + extra_tokens
+        self.prompt_sizes.append({"messages": len(self), "tokens": tokens})
+        return tokens
+
+    def stats(self) -> dict:
+        tokens = [size["tokens"] for size in self.prompt_sizes]
+        if not tokens:
+            return {"requests": 0}
+        return {
+            "requests": len(tokens),
+            "last_prompt_tokens": tokens[-1],
+            "mean_prompt_tokens": sum(tokens) // len(tokens),
+            "max_prompt_tokens": max(tokens),
+        }
+
+
+class ChatSession:
+    """Conversation state for one user session"""
+
+    def __init__(self, session_id: str = None, policy: HistoryPolicy = None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.history = ConversationHistory(policy=policy)
+        # Message of the exception that ended the last turn, if it failed
+        self.last_error = None
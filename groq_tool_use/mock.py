@@ -0,0 +1,88 @@
+"""Offline stand-in for the Groq client"""
+import json
+import string
+import time
+from types import SimpleNamespace
+from typing import List
+
+from .util import dumps, estimate_tokens
+
+
+class MockGroq:
+    """Offline stand-in for the `Groq` client that replays scripted completions.
+
+    Each scripted response is a dict with optional "content" and "tool_calls"
+    (a list of {"id", "name", "arguments"}). Requests are recorded in
+    `self.requests`; the last response repeats once the script runs out.
+    """
+
+    def __init__(self, responses: List[dict], latency: float = 0.0, chunk_size: int = 16):
+        self.responses = list(responses)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @classmethod
+    def from_file(cls, path: str, latency: float = 0.0, chunk_size: int = 16,
+                  repeat: int = 1, **values) -> "MockGroq":
+        """Replay a recording: a JSON file with a "responses" list in the scripted format.
+
+        `$name` placeholders in tool call arguments are replaced with `values`
+        (JSON-escaped), e.g. `file_path=...` for a generated data file, and the
+        script is repeated `repeat` times for multi-turn runs.
+        """
+        with open(path) as file:
+            recording = json.load(file)
+        escaped = {name: json.dumps(str(value))[1:-1] for name, value in values.items()}
+        responses = []
+        for response in recording["responses"]:
+            response = dict(response)
+            if "tool_calls" in response:
+                response["tool_calls"] = [
+                    dict(call, arguments=string.Template(call["arguments"]).safe_substitute(escaped))
+                    for call in response["tool_calls"]
+                ]
+            responses.append(response)
+        return cls(responses * repeat, latency=latency, chunk_size=chunk_size)
+
+    def _next_response(self) -> dict:
+        if len(self.responses) > 1:
+            return self.responses.pop(0)
+        return self.responses[0]
+
+    def _create(self, stream: bool = False, **kwargs):
+        self.requests.append(kwargs)
+        scripted = self._next_response()
+        if self.latency:
+            time.sleep(self.latency)
+        content = scripted.get("content", "")
+        tool_calls = [
+            SimpleNamespace(
+                id=call["id"],
+                type="function",
+                function=SimpleNamespace(name=call["name"], arguments=call["arguments"])
+            )
+            for call in scripted.get("tool_calls", [])
+        ]
+        prompt_tokens = estimate_tokens(dumps(kwargs.get("messages", [])))
+        completion_tokens = estimate_tokens(content) + 1
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                total_tokens=prompt_tokens + completion_tokens)
+        if stream:
+            return self._stream(content, tool_calls, usage)
+        message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls or None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+    def _stream(self, content: str, tool_calls: list, usage):
+        for start in range(0, len(content), self.chunk_size):
+            delta = SimpleNamespace(content=content[start:start + self.chunk_size], tool_calls=None)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)])
+        if tool_calls:
+            deltas = [
+                SimpleNamespace(index=index, id=call.id, type="function", function=call.function)
+                for index, call in enumerate(tool_calls)
+            ]
+            delta = SimpleNamespace(content=None, tool_calls=deltas)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason="tool_calls")])
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
@@ -0,0 +1,176 @@
+"""Tool registry: JSON schemas built from type-annotated signatures"""
+import inspect
+import typing
+from typing import List, Callable
+
+
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+def json_schema(annotation) -> dict:
+    """JSON schema for a parameter type hint"""
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin is typing.Union:
+        return json_schema(next(arg for arg in args if arg is not type(None)))
+    if annotation in JSON_TYPES:
+        return {"type": JSON_TYPES[annotation]}
+    if origin is list or annotation is list:
+        return {"type": "array", "items": json_schema(args[0])} if args else {"type": "array"}
+    if origin is dict or annotation is dict:
+        schema = {"type": "object"}
+        if args and args[1] is not typing.Any:
+            schema["additionalProperties"] = json_schema(args[1])
+        return schema
+    raise TypeError(f"Unsupported tool parameter type: {annotation!r}")
+
+
+class ToolRegistry:
+    """Tools the model can call, with JSON schemas built from their signatures.
+
+    Each tool is registered once (at import time for the `@tool` methods of
+    GroqDeepseek) with its description, parameter descriptions and flags:
+    `writes` (modifies `file_path`; serialized by the executor and never
+    cached), `read_only` (results may be cached) and `process_pool` (safe to
+    run in a worker process). Plugins call `register` with a plain function.
+    """
+
+    def __init__(self):
+        self.tools = {}
+        self._schemas = {}
+
+    def register(self, name: str, function: Callable, description: str, params: dict = None,
+                 writes: bool = False, read_only: bool = False, process_pool: bool = False,
+                 bound: bool = False):
+        """Add a tool. `params` maps parameter names to a description or extra schema fields.
+
+        `bound` marks GroqDeepseek methods, which are called with the instance.
+        """
+        params = params or {}
+        signature = inspect.signature(function)
+        hints = typing.get_type_hints(function)
+        properties, required = {}, []
+        for index, (param_name, param) in enumerate(signature.parameters.items()):
+            if bound and index == 0:
+                continue
+            schema = json_schema(hints.get(param_name, str))
+            extra = params.get(param_name, {})
+            schema.update({"description": extra} if isinstance(extra, str) else extra)
+            properties[param_name] = schema
+            if param.default is inspect.Parameter.empty:
+                required.append(param_name)
+        self.tools[name] = {
+            "name": name,
+            "function": function,
+            "bound": bound,
+            "writes": writes,
+            "read_only": read_only,
+            "process_pool": process_pool,
+            "schema": {
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "description": description,
+                    "parameters": {"type": "object", "properties": properties, "required": required}
+                }
+            }
+        }
+        self._schemas = {}
+        return function
+
+    def get(self, name: str):
+        return self.tools.get(name)
+
+    def has_flag(self, name: str, flag: str) -> bool:
+        spec = self.tools.get(name)
+        return spec is not None and spec[flag]
+
+    def schemas(self, names: List[str] = None) -> List[dict]:
+        """Tool schemas to send with a request: all tools, or only `names`"""
+        key = tuple(names) if names is not None else None
+        if key not in self._schemas:
+            selected = self.tools if names is None else [name for name in names if name in self.tools]
+            self._schemas[key] = [self.tools[name]["schema"] for name in selected]
+        return self._schemas[key]
+
+    def validate(self, name: str, args: dict):
+        """Return an error message for bad arguments, or None if they match the schema.
+
+        Numbers and booleans given where a string is expected (e.g. CSV cells
+        like `[["x", 1]]`) are converted to strings in `args`.
+        """
+        parameters = self.tools[name]["schema"]["function"]["parameters"]
+        if not isinstance(args, dict):
+            return "Tool arguments must be a JSON object"
+        for param_name in parameters["required"]:
+            if param_name not in args:
+                return f"Missing required argument '{param_name}'"
+        for param_name, value in args.items():
+            schema = parameters["properties"].get(param_name)
+            if schema is None:
+                return f"Unexpected argument '{param_name}'"
+            args[param_name], error = self._check(value, schema, param_name)
+            if error:
+                return error
+        return None
+
+    @classmethod
+    def _check(cls, value, schema: dict, path: str):
+        """Return (value, error): the value with scalars coerced to strings, or where it fails"""
+        kind = schema.get("type")
+        if value is None:
+            return value, None
+        if kind == "string":
+            if isinstance(value, (bool, int, float)):
+                return str(value), None
+            return value, None if isinstance(value, str) else f"Argument '{path}' must be of type string"
+        if kind == "integer":
+            ok = isinstance(value, int) and not isinstance(value, bool)
+            return value, None if ok else f"Argument '{path}' must be of type integer"
+        if kind == "number":
+            ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+            return value, None if ok else f"Argument '{path}' must be of type number"
+        if kind == "boolean":
+            return value, None if isinstance(value, bool) else f"Argument '{path}' must be of type boolean"
+        if kind == "array":
+            if not isinstance(value, list):
+                return value, f"Argument '{path}' must be of type array"
+            items = schema.get("items")
+            if items is None:
+                return value, None
+            checked = []
+            for index, item in enumerate(value):
+                item, error = cls._check(item, items, f"{path}[{index}]")
+                if error:
+                    return value, error
+                checked.append(item)
+            return checked, None
+        if kind == "object":
+            if not isinstance(value, dict):
+                return value, f"Argument '{path}' must be of type object"
+            for key in schema.get("required", []):
+                if key not in value:
+                    return value, f"Argument '{path}' is missing '{key}'"
+            properties = schema.get("properties", {})
+            values = schema.get("additionalProperties")
+            checked = {}
+            for key, item in value.items():
+                item_schema = properties.get(key, values)
+                if isinstance(item_schema, dict):
+                    item, error = cls._check(item, item_schema, f"{path}.{key}")
+                    if error:
+                        return value, error
+                checked[key] = item
+            return checked, None
+        return value, None
+
+
+TOOLS = ToolRegistry()
+
+
+def tool(name: str, description: str, writes: bool = False, read_only: bool = False,
+         process_pool: bool = False, **params):
+    """Register a GroqDeepseek method as a tool; keyword arguments describe its parameters"""
+    def decorator(method):
+        return TOOLS.register(name, method, description, params, writes=writes,
+                              read_only=read_only, process_pool=process_pool, bound=True)
+    return decorator
@@ -0,0 +1,220 @@
+"""Rich console rendering for the interactive REPL"""
+import time
+
+from rich import box
+from rich.console import Console
+from rich.live import Live
+from rich.panel import Panel
+from rich.segment import Segments
+from rich.table import Table
+
+from .util import ThinkStreamParser
+
+console = Console()
+
+
+class ConsoleRenderer:
+    """Render chat activity to the rich console.
+
+    Streamed completions are split into <think> reasoning and answer text as
+    they arrive. A transient `rich.live` region shows only what is still
+    changing: the last lines of the reasoning, then the answer's unfinished
+    markdown block. Finished reasoning and finished markdown blocks are
+    printed once above it. The live region shows only the last lines of a
+    long unfinished block (reopening its code fence if that was cut off),
+    so a refresh costs about the same however long the response or the
+    block grows. Refreshes are throttled to `refresh_per_second`.
+    """
+
+    # Lines of reasoning kept in the live panel while it streams
+    THINKING_TAIL_LINES = 12
+    # Lines of the answer's unfinished markdown block kept in the live region
+    ANSWER_TAIL_LINES = 20
+
+    def __init__(self, refresh_per_second: float = 10.0):
+        self.refresh_interval = 1 / refresh_per_second
+        self._status = None
+        self._live = None
+        self._parser = None
+        self._thinking = []
+        self._reset_answer()
+        self._printed_blocks = 0
+        self._last_refresh = 0.0
+
+    def _reset_answer(self):
+        # Complete blocks not yet printed, then the unfinished block's complete
+        # lines, the code fence open at the start of each, and its last partial line
+        self._finished = []
+        self._lines = []
+        self._line_fences = []
+        self._partial = ""
+        self._fence = None
+
+    def begin_completion(self):
+        self._status = console.status("[bold yellow]Thinking...", spinner="dots")
+        self._status.start()
+        self._parser = ThinkStreamParser()
+        self._thinking, self._printed_blocks = [], 0
+        self._reset_answer()
+
+    def _stop_status(self):
+        if self._status is not None:
+            self._status.stop()
+            self._status = None
+
+    def token(self, text: str):
+        self._stop_status()
+        if self._live is None:
+            # Only one live display can run at a time, so this starts after the spinner stops
+            self._live = Live(console=console, auto_refresh=False, transient=True)
+            self._live.start()
+        self._add(self._parser.feed(text))
+        now = time.perf_counter()
+        if now - self._last_refresh >= self.refresh_interval:
+            self._last_refresh = now
+            self._print_finished_blocks()
+            self._live.update(self._live_view(), refresh=True)
+
+    def end_completion(self):
+        self._stop_status()
+        if self._live is None:
+            return
+        self._add(self._parser.close())
+        self._print_thinking()
+        self._print_blocks("".join(self._finished + self._lines) + self._partial)
+        self._reset_answer()
+        self._live.stop()
+        self._live = None
+
+    def _add(self, pieces: list):
+        for kind, text in pieces:
+            if kind == "thinking":
+                self._thinking.append(text)
+            else:
+                self._print_thinking()
+                self._add_answer(text)
+        if not self._parser.in_think:
+            self._print_thinking()
+
+    def _print_thinking(self):
+        """Print a finished <think> block as one panel above the live region"""
+        thinking = "".join(self._thinking).strip()
+        self._thinking = []
+        if thinking:
+            console.print(self._thinking_panel(thinking))
+
+    def _add_answer(self, text: str):
+        """Split answer text into lines; a blank line outside a code fence finishes a block"""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._lines.append(line + "\n")
+            self._line_fences.append(self._fence)
+            stripped = line.strip()
+            if stripped.startswith(("```", "~~~")):
+                self._fence = None if self._fence is not None else line + "\n"
+            elif not stripped and self._fence is None:
+                self._finished.extend(self._lines)
+                self._lines, self._line_fences = [], []
+
+    def _print_finished_blocks(self):
+        """Print the answer's complete markdown blocks above the live region"""
+        if self._finished:
+            self._print_blocks("".join(self._finished))
+            self._finished = []
+
+    def _print_blocks(self, text: str):
+        if not text.strip():
+            return
+        segments = list(console.render(self._markdown(text)))
+        # Blocks printed separately lose the blank line markdown puts between them,
+        # except lists, quotes and tables, which start with one
+        if self._printed_blocks and segments and segments[0].text != "\n":
+            console.print()
+        console.print(Segments(segments))
+        self._printed_blocks += 1
+
+    def _live_view(self):
+        if self._thinking:
+            return self._thinking_panel(self._thinking_tail(), live=True)
+        return self._markdown(self._answer_tail())
+
+    def _answer_tail(self) -> str:
+        """The last ANSWER_TAIL_LINES lines of the unfinished block, inside its code fence if any"""
+        start = max(len(self._lines) - self.ANSWER_TAIL_LINES, 0)
+        tail = "".join(self._lines[start:]) + self._partial[-self.ANSWER_TAIL_LINES * max(console.width, 40):]
+        if start and self._line_fences[start] is not None:
+            # The fence was cut off; reopen it so the lines still render as code
+            tail = self._line_fences[start] + tail
+        return tail
+
+    def _thinking_tail(self) -> str:
+        """The last THINKING_TAIL_LINES lines of the reasoning, without joining all of it"""
+        limit = self.THINKING_TAIL_LINES * max(console.width, 40)
+        parts, size, newlines = [], 0, 0
+        for part in reversed(self._thinking):
+            parts.append(part)
+            size += len(part)
+            newlines += part.count("\n")
+            if size >= limit or newlines > self.THINKING_TAIL_LINES:
+                break
+        lines = "".join(reversed(parts))[-limit:].strip().splitlines()
+        tail = "\n".join(lines[-self.THINKING_TAIL_LINES:])
+        if len(parts) < len(self._thinking) or len(lines) > self.THINKING_TAIL_LINES or size > limit:
+            return "...\n" + tail
+        return tail
+
+    @staticmethod
+    def _thinking_panel(thinking: str, live: bool = False) -> Panel:
+        return Panel(
+            thinking,
+            title="[bold yellow]Thinking Process" + ("..." if live else ""),
+            border_style="yellow",
+            expand=False,
+            padding=(1, 2)
+        )
+
+    @staticmethod
+    def _markdown(text: str):
+        # Try to parse as markdown
+        try:
+            # rich.markdown is slow to import, so load it with the first response
+            from rich.markdown import Markdown
+            return Markdown(text)
+        except:
+            return text
+
+    def tool_result(self, result: dict):
+        # Show tool execution in a subtle way
+        line = (f"[dim]Executed {result['name']} in {result['elapsed_ms']:.1f} ms, "
+                f"{result['bytes']:,} bytes (~{result['tokens']:,} tokens)")
+        if result["saved_bytes"]:
+            line += f", saved {result['saved_bytes']:,} bytes (~{result['saved_tokens']:,} tokens)"
+        console.print(line + "[/]")
+
+    def response(self, thinking, response):
+        if thinking:
+            console.print(self._thinking_panel(thinking))
+
+        if response:
+            console.print(self._markdown(response))
+
+    def error(self, message: str):
+        console.print(Panel(
+            f"[red]Error: {message}[/]",
+            title="Error",
+            border_style="red"
+        ))
+
+    def stats(self, stats: dict):
+        table = Table(title="Session latency", box=box.SIMPLE)
+        for column in ("span", "count", "p50 ms", "p95 ms", "max ms"):
+            table.add_column(column, justify="left" if column == "span" else "right")
+        for name, span in sorted(stats["spans"].items()):
+            table.add_row(name, str(span["count"]), f"{span['p50_ms']:.1f}",
+                          f"{span['p95_ms']:.1f}", f"{span['max_ms']:.1f}")
+        console.print(table)
+        totals = dict(stats["totals"], **{f"history {key}": value
+                                         for key, value in stats.get("history", {}).items()})
+        console.print("[dim]" + ", ".join(f"{key.replace('_', ' ')}: {value:,}"
+                                          for key, value in totals.items()) + "[/]")
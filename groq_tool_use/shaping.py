@@ -0,0 +1,164 @@
+"""Fit tool results into the token budget"""
+from __future__ import annotations
+
+import threading
+from typing import List, Dict, Callable
+
+from .tracing import traced
+from .util import LazyModule, dumps, estimate_tokens
+
+pd = LazyModule("pandas")
+
+
+class ResultShaper:
+    """Fit tool results into a token budget.
+
+    A frame that fits is sent whole. Otherwise the payload keeps the first and
+    last rows that fit, per-column summaries, an `omitted_rows` marker and the
+    offset to page from, with a hint naming the tool to page with (`read_rows`
+    for file rows, the producing tool itself for derived frames). Long cells are cut to
+    `max_cell_chars`. The size the unshaped rows would have had is recorded
+    per thread so the executor can report what was saved.
+    """
+
+    SAMPLE_ROWS = 1000
+    READ_ROWS_HINT = "Use read_rows with offset and limit to page through the omitted rows"
+
+    def __init__(self, budget_tokens: int = 2000, max_cell_chars: int = 200):
+        self.budget_tokens = budget_tokens
+        self.max_cell_chars = max_cell_chars
+        self._local = threading.local()
+
+    def take_raw_bytes(self) -> int:
+        """Return and clear the unshaped size recorded by the last call on this thread"""
+        raw_bytes = getattr(self._local, "raw_bytes", 0)
+        self._local.raw_bytes = 0
+        return raw_bytes
+
+    def _record_raw(self, raw_bytes: int):
+        self._local.raw_bytes = getattr(self._local, "raw_bytes", 0) + raw_bytes
+
+    def _cell(self, value):
+        if isinstance(value, str) and len(value) > self.max_cell_chars:
+            return f"{value[:self.max_cell_chars]}...[+{len(value) - self.max_cell_chars} chars]"
+        return value
+
+    def rows(self, df: pd.DataFrame) -> List[list]:
+        values = df.astype(object).where(df.notna(), None).values.tolist()
+        return [[self._cell(value) for value in row] for row in values]
+
+    def _raw_bytes(self, df: pd.DataFrame) -> int:
+        """Size of every row serialized once, extrapolated from a sample for big frames"""
+        if len(df) <= self.SAMPLE_ROWS:
+            return len(dumps(df.astype(object).where(df.notna(), None).values.tolist()))
+        step = len(df) // self.SAMPLE_ROWS
+        sample = df.iloc[::step].head(self.SAMPLE_ROWS)
+        sample_bytes = len(dumps(sample.astype(object).where(sample.notna(), None).values.tolist()))
+        return sample_bytes * len(df) // len(sample)
+
+    def _fits(self, payload: dict) -> bool:
+        return estimate_tokens(dumps(payload)) <= self.budget_tokens
+
+    def _max_rows(self, df: pd.DataFrame) -> int:
+        """Upper bound on the rows that can fit: a JSON row takes at least two characters per cell"""
+        return self.budget_tokens * 4 // (2 * max(len(df.columns), 1) + 1) + 1
+
+    @staticmethod
+    def summarize(df: pd.DataFrame) -> Dict[str, dict]:
+        summary = {}
+        for name in df.columns:
+            column = df[name]
+            info = {"dtype": str(column.dtype), "nulls": int(column.isna().sum())}
+            if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+                info.update(min=column.min(), max=column.max(), mean=column.mean())
+            else:
+                counts = column.value_counts().head(3)
+                info.update(unique=int(column.nunique()), top={str(key): int(count) for key, count in counts.items()})
+            summary[str(name)] = info
+        return summary
+
+    @traced("serialize")
+    def frame(self, df: pd.DataFrame, extra: dict = None, offset: int = 0, hint: str = READ_ROWS_HINT) -> str:
+        """Serialize a frame within the budget, sampling head and tail rows if needed.
+
+        `offset` is the position of the frame's first row in whatever `hint`
+        pages through, so `next_offset` can be passed back as is.
+        """
+        self._record_raw(self._raw_bytes(df))
+        payload = dict(extra or {})
+        payload.update(columns=[str(name) for name in df.columns], shape=df.shape)
+        if len(df) <= self._max_rows(df):
+            whole = dict(payload, rows=self.rows(df))
+            if self._fits(whole):
+                return dumps(whole)
+
+        payload["summary"] = self.summarize(df)
+
+        def sampled(count: int) -> dict:
+            return dict(
+                payload,
+                head=self.rows(df.head(count)),
+                tail=self.rows(df.tail(count)),
+                omitted_rows=len(df) - 2 * count,
+                truncated=True,
+                next_offset=offset + count,
+                hint=hint
+            )
+
+        # Largest head/tail sample that still fits the budget
+        low, high = 0, min(len(df) // 2, self._max_rows(df) // 2)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._fits(sampled(middle)):
+                low = middle
+            else:
+                high = middle - 1
+        return dumps(sampled(low))
+
+    @traced("serialize")
+    def page(self, df: pd.DataFrame, offset: int, limit: int, extra: dict = None) -> str:
+        """Serialize rows [offset, offset + limit), stopping early at the budget"""
+        window = df.iloc[offset:offset + limit]
+        self._record_raw(self._raw_bytes(window))
+        payload = dict(extra or {})
+        payload.update(columns=[str(name) for name in df.columns], total_rows=len(df), offset=offset)
+        low, high = 0, min(len(window), self._max_rows(df))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._fits(dict(payload, rows=self.rows(window.head(middle)))):
+                low = middle
+            else:
+                high = middle - 1
+        payload["rows"] = self.rows(window.head(low))
+        if offset + low < len(df):
+            payload["next_offset"] = offset + low
+        return dumps(payload)
+
+    @traced("serialize")
+    def excerpt(self, read: Callable[[int], dict], raw_bytes: int = 0) -> str:
+        """Serialize a bounded read, calling `read(max_bytes)` with smaller budgets until it fits"""
+        self._record_raw(raw_bytes)
+        max_bytes = max(self.budget_tokens * 4 - 200, 64)
+        while True:
+            payload = read(max_bytes)
+            # JSON escaping can make the text longer than the bytes read
+            if max_bytes <= 64 or self._fits(payload):
+                return dumps(payload)
+            max_bytes = max(max_bytes * 3 // 4, 64)
+
+    @traced("serialize")
+    def text(self, content: str, offset: int = 0, extra: dict = None) -> str:
+        """Serialize text, cutting it to the budget from `offset` characters"""
+        self._record_raw(len(content.encode()))
+        payload = dict(extra or {})
+        if offset == 0 and self._fits(dict(payload, content=content)):
+            return dumps(dict(payload, content=content))
+        # Leave room for the envelope; JSON escaping can only make the text longer
+        max_chars = max(self.budget_tokens * 4 - 200, 0)
+        chunk = content[offset:offset + max_chars]
+        while chunk and not self._fits(dict(payload, content=chunk)):
+            chunk = chunk[:len(chunk) * 3 // 4]
+        payload.update(content=chunk, offset=offset, total_chars=len(content), truncated=True)
+        if offset + len(chunk) < len(content):
+            payload["next_offset"] = offset + len(chunk)
+        return dumps(payload)
@@ -0,0 +1,192 @@
+"""Span tracing for API calls, tools, serialization and rendering"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from .util import LazyModule, dumps
+
+np = LazyModule("numpy")
+
+
+_active_span = contextvars.ContextVar("active_span", default=None)
+
+
+class Span:
+    """One timed operation; attributes can be added with `set` until it ends"""
+
+    def __init__(self, tracer: "Tracer", name: str, parent: "Span" = None, attributes: dict = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def end(self):
+        self.duration_ms = self.elapsed_ms()
+
+
+class _NullSpan:
+    def set(self, **attributes):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collect spans for API calls, tool runs, serialization and rendering.
+
+    Durations are kept per span name (the last `max_samples` of each) for
+    `stats`, and token/byte attributes are summed. With a `path`, every
+    finished span is also appended to that file as one JSON line, either as a
+    flat record (`format="jsonl"`) or as an OTLP/JSON `resourceSpans` export
+    (`format="otlp"`) that OpenTelemetry collectors can ingest.
+    """
+
+    SUMMED_ATTRIBUTES = ("prompt_tokens", "completion_tokens", "request_bytes", "result_bytes")
+    CLIENT_SPANS = {"api_call"}
+
+    def __init__(self, path: str = None, format: str = "jsonl", max_samples: int = 10_000,
+                 service_name: str = "groq-deepseek"):
+        if format not in ("jsonl", "otlp"):
+            raise ValueError(f"Unknown trace format '{format}', use jsonl or otlp")
+        self.path = path
+        self.format = format
+        self.max_samples = max_samples
+        self.service_name = service_name
+        self.samples = {}
+        self.totals = {}
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1) if path else None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the enclosed block as a child of the active span (or a new trace)"""
+        parent = _active_span.get()
+        span = Span(self, name, parent if parent is not None and parent.tracer is self else None, attributes)
+        token = _active_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            _active_span.reset(token)
+            span.end()
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            samples = self.samples.get(span.name)
+            if samples is None:
+                samples = self.samples[span.name] = deque(maxlen=self.max_samples)
+            samples.append(span.duration_ms)
+            for name in self.SUMMED_ATTRIBUTES:
+                value = span.attributes.get(name)
+                if isinstance(value, (int, float)):
+                    self.totals[name] = self.totals.get(name, 0) + value
+            if self._file is not None:
+                record = self._otlp(span) if self.format == "otlp" else self._record(span)
+                self._file.write(dumps(record) + "\n")
+
+    @staticmethod
+    def _record(span: Span) -> dict:
+        return {
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "start": span.start_ns / 1e9,
+            "duration_ms": round(span.duration_ms, 3),
+            "attributes": span.attributes,
+        }
+
+    @staticmethod
+    def _otlp_value(value) -> dict:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def _otlp(self, span: Span) -> dict:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            # SPAN_KIND_CLIENT for remote calls, SPAN_KIND_INTERNAL otherwise
+            "kind": 3 if span.name in self.CLIENT_SPANS else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.start_ns + int(span.duration_ms * 1e6)),
+            "attributes": [{"key": key, "value": self._otlp_value(value)}
+                           for key, value in span.attributes.items()],
+            # STATUS_CODE_ERROR or STATUS_CODE_UNSET
+            "status": {"code": 2} if span.attributes.get("error") else {},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": "Groq_Tool_Use"}, "spans": [otlp_span]}],
+        }]}
+
+    def stats(self) -> dict:
+        """Count and p50/p95/max latency (ms) per span name, plus summed tokens and bytes"""
+        with self._lock:
+            spans = {}
+            for name, samples in self.samples.items():
+                p50, p95 = np.percentile(samples, [50, 95])
+                spans[name] = {
+                    "count": len(samples),
+                    "p50_ms": float(p50),
+                    "p95_ms": float(p95),
+                    "max_ms": max(samples),
+                }
+            return {"spans": spans, "totals": dict(self.totals)}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Child span of the active span's tracer; a no-op outside any traced call"""
+    parent = _active_span.get()
+    if parent is None:
+        yield NULL_SPAN
+        return
+    with parent.tracer.span(name, **attributes) as span:
+        yield span
+
+
+def traced(name: str):
+    """Decorator that runs a function inside `trace_span(name)`"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with trace_span(name, function=function.__name__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,191 @@
+"""API clients, retries, client-side rate limiting and stream accumulation.
+
+groq and httpx are imported when the first real client is built, so tool-only
+and offline (MockGroq) use never loads them.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .util import load_env
+
+
+def groq_client(async_client: bool = False, max_connections: int = 64, timeout: float = 120.0, **kwargs):
+    """A Groq (or AsyncGroq) client on one pooled keep-alive HTTP connection pool.
+
+    The SDK's own retries are turned off because GroqDeepseek retries with
+    its RetryPolicy and RateLimiter. Share one client between sessions.
+    """
+    import httpx
+    from groq import Groq, AsyncGroq
+    load_env()
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    kwargs.setdefault("api_key", os.getenv('GROQ_API_KEY'))
+    if async_client:
+        return AsyncGroq(max_retries=0, http_client=httpx.AsyncClient(limits=limits, timeout=timeout), **kwargs)
+    return Groq(max_retries=0, http_client=httpx.Client(limits=limits, timeout=timeout), **kwargs)
+
+
+class RetryPolicy:
+    """Which completion errors to retry and how long to wait before each attempt.
+
+    Throttling (429), timeouts, conflicts, 5xx responses and connection
+    errors are retried up to `max_retries` times. A `Retry-After` header
+    (seconds or an HTTP date) is honored; otherwise the wait is exponential
+    backoff with full jitter, capped at `max_delay`.
+    """
+
+    RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def retry_after(error: Exception):
+        """Seconds the server asked us to wait, if it said"""
+        response = getattr(error, "response", None)
+        value = response.headers.get("retry-after") if response is not None else None
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def retryable(self, error: Exception) -> bool:
+        import httpx
+        from groq import APIConnectionError, APIStatusError
+        if isinstance(error, APIStatusError):
+            return error.status_code in self.RETRY_STATUS
+        return isinstance(error, (APIConnectionError, httpx.TransportError))
+
+    def delay(self, attempt: int, error: Exception):
+        """Seconds to wait before retry number `attempt` + 1, or None to give up"""
+        if attempt >= self.max_retries or not self.retryable(error):
+            return None
+        retry_after = self.retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class RateLimiter:
+    """Client-side token buckets for the account's requests and tokens per minute.
+
+    Callers reserve a request and their estimated prompt tokens before each
+    completion; when a bucket is empty they wait their turn instead of
+    getting a 429. Buckets may go negative, so waits are handed out in
+    arrival order. `settle` charges the actual usage once it is known, and
+    `pause` holds every caller back after the server throttles anyway.
+    A limit of None is unlimited.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = requests_per_minute or 0.0
+        self._tokens = tokens_per_minute or 0.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute,
+                                 self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Take one request and `tokens` from the buckets; returns the seconds to wait first"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(self._paused_until - now, 0.0)
+            if self.requests_per_minute:
+                self._requests -= 1
+                wait = max(wait, -self._requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A request bigger than the whole bucket would otherwise wait forever
+                self._tokens -= min(tokens, self.tokens_per_minute)
+                wait = max(wait, -self._tokens * 60 / self.tokens_per_minute)
+            return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, reserved: int, used: int):
+        """Charge (or refund) the difference between reserved and actual tokens"""
+        if self.tokens_per_minute:
+            with self._lock:
+                self._tokens -= used - reserved
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class StreamAccumulator:
+    """Collect streamed chunks into one assistant message.
+
+    Content deltas are concatenated and tool call deltas are merged by index;
+    the usage block, when the server sends one, is kept in `usage`.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.calls = {}
+        self.usage = None
+
+    def add(self, chunk) -> str:
+        """Merge one chunk and return its new content text (may be empty)"""
+        # Groq reports usage on the last chunk under x_groq, OpenAI-style servers on the chunk
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+        if usage is not None:
+            self.usage = usage
+        if not chunk.choices:
+            return ""
+        delta = chunk.choices[0].delta
+        for call_delta in delta.tool_calls or []:
+            call = self.calls.setdefault(call_delta.index, {
+                "id": None,
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if call_delta.id:
+                call["id"] = call_delta.id
+            if call_delta.function:
+                if call_delta.function.name:
+                    call["function"]["name"] += call_delta.function.name
+                if call_delta.function.arguments:
+                    call["function"]["arguments"] += call_delta.function.arguments
+        if delta.content:
+            self.parts.append(delta.content)
+            return delta.content
+        return ""
+
+    def message(self) -> dict:
+        message = {"role": "assistant", "content": "".join(self.parts)}
+        if self.calls:
+            message["tool_calls"] = [self.calls[index] for index in sorted(self.calls)]
+        return message
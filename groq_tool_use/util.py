@@ -0,0 +1,139 @@
+"""Small helpers shared by the tools: serialization, atomic writes, lazy imports"""
+import functools
+import importlib
+import json
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from typing import List, Tuple
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class LazyModule:
+    """Stand-in for a heavy module that is imported on first attribute access.
+
+    `pd = LazyModule("pandas")` reads like `import pandas as pd`, but pandas is
+    only loaded when a tool first touches `pd.something`, so importing the
+    package and using the plain file tools stays fast.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+@functools.lru_cache(maxsize=None)
+def load_env():
+    """Load variables from a .env file once, when a client or the CLI first needs them"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def extract_think_content(text):
+    """Extract content between <think> tags and format the rest"""
+    think_pattern = r'<think>(.*?)</think>'
+    matches = re.findall(think_pattern, text, re.DOTALL)
+    if matches:
+        thinking = matches[0].strip()
+        response = re.sub(think_pattern, '', text, flags=re.DOTALL).strip()
+        return thinking, response
+    return None, text
+
+
+class ThinkStreamParser:
+    """Split streamed text into <think> reasoning and answer text, chunk by chunk.
+
+    `feed` returns ("thinking" | "answer", text) pieces for everything it can
+    classify. A chunk ending in something that could be the start of a tag
+    (`<th`, `</thi`, ...) keeps that fragment until the next chunk settles it,
+    so tags split across chunk boundaries are still recognized. Each chunk is
+    scanned once, so the cost is proportional to the new text.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.in_think = False
+        self._pending = ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        text, self._pending = self._pending + text, ""
+        pieces = []
+        while text:
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            index = text.find(tag)
+            if index >= 0:
+                self._emit(pieces, text[:index])
+                self.in_think = not self.in_think
+                text = text[index + len(tag):]
+                continue
+            keep = self._partial_tag(text, tag)
+            self._emit(pieces, text[:len(text) - keep])
+            self._pending = text[len(text) - keep:]
+            break
+        return pieces
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flush a held-back fragment at the end of the stream"""
+        pieces = []
+        self._emit(pieces, self._pending)
+        self._pending = ""
+        return pieces
+
+    def _emit(self, pieces: list, text: str):
+        if text:
+            pieces.append(("thinking" if self.in_think else "answer", text))
+
+    @staticmethod
+    def _partial_tag(text: str, tag: str) -> int:
+        """Length of the longest suffix of `text` that is a proper prefix of `tag`"""
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+
+def dumps(obj) -> str:
+    """Serialize a tool result, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj, default=str)
+
+
+@contextmanager
+def atomic_write(file_path: str, mode: str = "w", **open_kwargs):
+    """Open a temp file next to `file_path` and rename it over the target on success.
+
+    Readers see either the old file or the complete new one, never a partial
+    write; on error the temp file is removed and the target is untouched.
+    """
+    temp_path = f"{os.path.abspath(file_path)}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temp_path, mode, **open_kwargs) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
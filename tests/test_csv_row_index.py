@@ -0,0 +1,96 @@
+"""CsvRowIndex row numbering, in-place and journaled edits, checked against pandas"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_tool_use import CsvRowIndex, CsvRowStore
+
+
+def write(tmp_path, data: bytes) -> str:
+    path = str(tmp_path / "data.csv")
+    with open(path, "wb") as file:
+        file.write(data)
+    return path
+
+
+def pandas_rows(path: str) -> list:
+    return pd.read_csv(path, dtype=str, keep_default_na=False).values.tolist()
+
+
+def index_rows(index: CsvRowIndex) -> list:
+    return [index.row_values(row) for row in range(len(index))]
+
+
+@pytest.mark.parametrize("data", [
+    b"a,b\n1,2\n\n3,4\n",
+    b"a,b\n1,2\n   \n3,4\n",
+    b"a,b\n1,2\n\t \r\n3,4\n",
+    b"a,b\n\n   \n1,2\n  ,x\n3,4\n\n",
+    b"a,b\n1,2\n3,4",
+    b"a,b\n1,2\n   ",
+], ids=["empty", "spaces", "tab-cr", "leading-space-row", "no-final-newline", "trailing-whitespace"])
+def test_blank_and_whitespace_lines_match_pandas(tmp_path, data):
+    path = write(tmp_path, data)
+    assert index_rows(CsvRowIndex(path)) == pandas_rows(path)
+
+
+def test_small_blocks_match_pandas(tmp_path, monkeypatch):
+    # Lines and blank lines split across block boundaries
+    monkeypatch.setattr(CsvRowIndex, "BLOCK_SIZE", 3)
+    path = write(tmp_path, b"a,b\n1,2\n\n   \n33,44\n \t\n5,6\n")
+    assert index_rows(CsvRowIndex(path)) == pandas_rows(path)
+
+
+def test_quoted_multiline_records(tmp_path):
+    path = write(tmp_path, b'a,b\n1,"two\nlines"\n\n"x, ""y""",3\n   \n4,"a\n\nb"\n')
+    index = CsvRowIndex(path)
+    assert index_rows(index) == pandas_rows(path)
+    assert index.row_values(0) == ["1", "two\nlines"]
+
+
+def test_crlf_file(tmp_path):
+    path = write(tmp_path, b"a,b\r\n1,2\r\n\r\n3,4\r\n")
+    index = CsvRowIndex(path)
+    assert index_rows(index) == pandas_rows(path) == [["1", "2"], ["3", "4"]]
+    index.update([(1, "a", "longer")])
+    index.compact()
+    with open(path, "rb") as file:
+        assert file.read() == b"a,b\r\n1,2\r\n\r\n" + b"longer,4\r\n"
+
+
+def test_same_length_edit_is_in_place(tmp_path):
+    path = write(tmp_path, b"a,b\n1,2\n   \n3,4\n")
+    store = CsvRowStore()
+    store.update_cells(path, [(1, "a", "7")])
+    assert not os.path.exists(path + ".journal")
+    with open(path, "rb") as file:
+        assert file.read() == b"a,b\n1,2\n   \n7,4\n"
+
+
+def test_journaled_edit_then_compact(tmp_path):
+    path = write(tmp_path, b"a,b\n1,2\n3,4\n")
+    store = CsvRowStore()
+    store.update_cells(path, [(0, "b", "twenty")])
+    # Journaled: the file is untouched until compaction, but reads see the edit
+    assert os.path.exists(path + ".journal")
+    with open(path, "rb") as file:
+        assert file.read() == b"a,b\n1,2\n3,4\n"
+    assert store.index(path).row_values(0) == ["1", "twenty"]
+    assert store.compact(path)
+    assert not os.path.exists(path + ".journal")
+    assert pandas_rows(path) == [["1", "twenty"], ["3", "4"]]
+
+
+def test_journal_is_replayed_by_a_new_store(tmp_path):
+    path = write(tmp_path, b"a,b\n1,2\n3,4\n")
+    CsvRowStore().update_cells(path, [(1, "a", "thirty")])
+    # A later process finds the journal and applies it
+    store = CsvRowStore()
+    assert store.index(path).row_values(1) == ["thirty", "4"]
+    assert store.compact(path)
+    assert pandas_rows(path) == [["1", "2"], ["thirty", "4"]]
+    assert not os.path.exists(path + ".journal")
@@ -0,0 +1,107 @@
+"""query_csv results against the same query run in pandas"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_tool_use import GroqDeepseek, MockGroq, NullRenderer
+
+
+@pytest.fixture
+def data(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "id": np.arange(3000),
+        "team": rng.choice(["red", "green", "blue"], 3000),
+        "v": rng.random(3000).round(4),
+    })
+    path = str(tmp_path / "data.csv")
+    frame.to_csv(path, index=False)
+    return path, frame
+
+
+def new_chat(stream: bool, budget: int = 2000) -> GroqDeepseek:
+    chat = GroqDeepseek(client=MockGroq([{}]), renderer=NullRenderer(), result_token_budget=budget)
+    # Read in several chunks whenever the query is streamed
+    chat.QUERY_CHUNK_ROWS = 700
+    if stream:
+        chat.STREAM_QUERY_BYTES = 0
+    return chat
+
+
+def query(chat: GroqDeepseek, **args) -> dict:
+    return json.loads(chat.execute_tool("query_csv", args))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_truncated_result_pages_through_matching_rows(data, stream):
+    path, frame = data
+    expected = frame.query("v > 0.5")["id"].tolist()
+    chat = new_chat(stream, budget=1500)
+    ids, offset = [], 0
+    while offset is not None:
+        result = query(chat, file_path=path, query="v > 0.5", limit=1000, offset=offset)
+        rows = result.get("rows") or result["head"]
+        assert rows, result
+        # The first page's next_offset points into the matches, not the file
+        assert "read_rows" not in result.get("hint", "")
+        ids.extend(row[0] for row in rows)
+        offset = result.get("next_offset")
+    chat.close()
+    assert ids == expected
+
+
+AGGREGATE = {"v": "mean", "id": "max"}
+
+
+def expected_aggregate(frame: pd.DataFrame, query_text: str, group_by: str = None) -> list:
+    matched = frame.query(query_text)
+    if group_by:
+        expected = matched.groupby(group_by).agg(v_mean=("v", "mean"), id_max=("id", "max")).reset_index()
+    else:
+        expected = pd.DataFrame({"v_mean": [matched["v"].mean()], "id_max": [matched["id"].max()]})
+    return expected.values.tolist()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize("group_by", [None, "team"])
+def test_aggregates_match_pandas(data, stream, group_by):
+    path, frame = data
+    chat = new_chat(stream)
+    result = query(chat, file_path=path, query="v > 0.25", aggregate=AGGREGATE, group_by=group_by)
+    chat.close()
+    assert result["rows_scanned"] == len(frame)
+    assert result["matched_rows"] == int((frame["v"] > 0.25).sum())
+    rows = sorted(result["rows"], key=str)
+    expected = sorted(expected_aggregate(frame, "v > 0.25", group_by), key=str)
+    assert len(rows) == len(expected)
+    for row, want in zip(rows, expected):
+        if group_by:
+            assert row[0] == want[0]
+            row, want = row[1:], want[1:]
+        assert row == pytest.approx(want)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_empty_match(data, stream):
+    path, _ = data
+    chat = new_chat(stream)
+    grouped = query(chat, file_path=path, query="v > 2", aggregate=AGGREGATE, group_by="team")
+    ungrouped = query(chat, file_path=path, query="v > 2", aggregate={"v": "count"})
+    chat.close()
+    assert grouped["columns"] == ["team", "v_mean", "id_max"]
+    assert grouped["rows"] == [] and grouped["matched_rows"] == 0
+    assert ungrouped["rows"] == [[0]]
+
+
+def test_negative_limit_is_rejected(data):
+    path, _ = data
+    chat = new_chat(False)
+    result = query(chat, file_path=path, query="v > 0.5", limit=-5)
+    chat.close()
+    assert "error" in result
@@ -0,0 +1,129 @@
+"""Retries and client-side rate limiting against the throttling fake server.
+
+    python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_tool_use import AsyncGroqDeepseek, GroqDeepseek, NullRenderer, RateLimiter, RetryPolicy, groq_client
+from fake_groq_server import FakeCompletionServer
+
+
+class RecordingRenderer(NullRenderer):
+    def __init__(self):
+        self.tokens = []
+
+    def token(self, text: str):
+        self.tokens.append(text)
+
+
+def new_chat(server: FakeCompletionServer, retry_policy: RetryPolicy, stream: bool = False,
+             renderer=None) -> GroqDeepseek:
+    return GroqDeepseek(
+        client=groq_client(base_url=server.base_url, api_key="fake"),
+        renderer=renderer or NullRenderer(),
+        retry_policy=retry_policy,
+        stream=stream,
+    )
+
+
+def test_retry_after_is_honored():
+    # Backoff alone would retry almost at once; only Retry-After makes it wait
+    with FakeCompletionServer(failures=[429, 503], retry_after=0.3) as server:
+        chat = new_chat(server, RetryPolicy(max_retries=3, base_delay=0.001))
+        start = time.perf_counter()
+        reply = chat.chat("hello")
+        elapsed = time.perf_counter() - start
+        chat.close()
+    assert reply == "Echo: hello"
+    assert server.rejected == [429, 503]
+    assert len(server.requests) == 1
+    assert elapsed >= 0.6
+
+
+def test_retries_stop_after_max_retries():
+    with FakeCompletionServer(failures=[503, 503, 503, 503], retry_after=0.01) as server:
+        chat = new_chat(server, RetryPolicy(max_retries=2))
+        reply = chat.chat("hello")
+        chat.close()
+    assert reply.startswith("An error occurred")
+    assert "503" in chat.session.last_error
+    # The first attempt and two retries; the fourth failure is never requested
+    assert server.rejected == [503, 503, 503]
+    assert server.requests == []
+
+
+def test_started_stream_is_not_retried():
+    renderer = RecordingRenderer()
+    with FakeCompletionServer(broken_streams=1) as server:
+        chat = new_chat(server, RetryPolicy(max_retries=3, base_delay=0.001), stream=True, renderer=renderer)
+        reply = chat.chat("hello")
+        chat.close()
+    assert reply.startswith("An error occurred")
+    assert renderer.tokens == ["<think>Echoing t"]
+    assert len(server.requests) == 1
+
+
+def test_unstarted_stream_is_retried():
+    renderer = RecordingRenderer()
+    with FakeCompletionServer(failures=[503], retry_after=0.01) as server:
+        chat = new_chat(server, RetryPolicy(max_retries=3), stream=True, renderer=renderer)
+        reply = chat.chat("hello")
+        chat.close()
+    assert reply == "Echo: hello"
+    assert "".join(renderer.tokens).endswith("Echo: hello")
+
+
+async def run_sessions(server: FakeCompletionServer, sessions: int, limiter: RateLimiter) -> list:
+    chat = AsyncGroqDeepseek(
+        client=groq_client(async_client=True, base_url=server.base_url, api_key="fake"),
+        rate_limiter=limiter,
+        retry_policy=RetryPolicy(max_retries=0),
+        max_concurrent_requests=64,
+    )
+    replies = await asyncio.gather(*(chat.chat(chat.new_session(), "hello") for _ in range(sessions)))
+    chat.close()
+    return replies
+
+
+def test_rate_limiter_queues_instead_of_429s():
+    # Well over the server's bucket, with no retries to hide the 429s
+    rpm = 240
+    with FakeCompletionServer(requests_per_minute=rpm) as server:
+        unlimited = asyncio.run(run_sessions(server, 300, RateLimiter()))
+    assert 429 in server.rejected
+    assert sum(reply == "Echo: hello" for reply in unlimited) < 300
+
+    # A limiter a little under the server's limit, as the clocks of the two buckets differ;
+    # the 14 sessions over its bucket wait about 3.7 s in turn
+    limit, sessions = 230, 244
+    with FakeCompletionServer(requests_per_minute=rpm) as server:
+        start = time.perf_counter()
+        limited = asyncio.run(run_sessions(server, sessions, RateLimiter(requests_per_minute=limit)))
+        elapsed = time.perf_counter() - start
+    assert server.rejected == []
+    assert limited == ["Echo: hello"] * sessions
+    assert elapsed >= (sessions - limit - 1) * 60 / limit
+
+
+def test_instance_survives_a_second_event_loop():
+    with FakeCompletionServer() as server:
+        chat = AsyncGroqDeepseek(retry_policy=RetryPolicy(max_retries=0), max_concurrent_requests=1)
+        sessions = [chat.new_session() for _ in range(4)]
+
+        async def run() -> list:
+            # The HTTP client is bound to its loop as well, so each run brings its own
+            chat.client = groq_client(async_client=True, base_url=server.base_url, api_key="fake")
+            return await asyncio.gather(*(chat.chat(session, "hello") for session in sessions))
+
+        # Four sessions on one slot leave waiters on the semaphore in both runs
+        first, second = asyncio.run(run()), asyncio.run(run())
+        stats = chat.stats()
+        chat.close()
+    assert first == second == ["Echo: hello"] * 4
+    assert stats["history"]["sessions"] == 4
+    assert stats["history"]["requests"] == 8
@@ -0,0 +1,58 @@
+"""ThinkStreamParser: tags split across chunks and text that only looks like a tag"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_tool_use.util import ThinkStreamParser, extract_think_content
+
+TEXT = "<think>Look at the data.</think>The answer is 42."
+
+
+def parse(chunks) -> tuple:
+    """Feed chunks and return the joined (thinking, answer) text"""
+    parser = ThinkStreamParser()
+    pieces = [piece for chunk in chunks for piece in parser.feed(chunk)] + parser.close()
+    thinking = "".join(text for kind, text in pieces if kind == "thinking")
+    answer = "".join(text for kind, text in pieces if kind == "answer")
+    return thinking, answer
+
+
+@pytest.mark.parametrize("split", range(len(TEXT) + 1))
+def test_split_at_every_offset(split):
+    assert parse([TEXT[:split], TEXT[split:]]) == ("Look at the data.", "The answer is 42.")
+
+
+def test_one_character_chunks():
+    assert parse(list(TEXT)) == ("Look at the data.", "The answer is 42.")
+
+
+@pytest.mark.parametrize("chunks", [["<th", "ink>x</think>y"], ["<think>x</thi", "nk>y"]])
+def test_named_splits(chunks):
+    assert parse(chunks) == ("x", "y")
+
+
+def test_partial_tag_is_held_back_until_settled():
+    parser = ThinkStreamParser()
+    assert parser.feed("a <th") == [("answer", "a ")]
+    assert parser.feed("ink>b") == [("thinking", "b")]
+    assert parser.in_think
+
+
+def test_trailing_less_than_is_flushed_on_close():
+    parser = ThinkStreamParser()
+    assert parser.feed("x <") == [("answer", "x ")]
+    assert parser.close() == [("answer", "<")]
+
+
+def test_text_that_is_not_a_tag():
+    text = "a <think is not a tag, nor is <thinking> or </think without >"
+    assert parse([text[:9], text[9:]]) == ("", text)
+    assert parse(list(text)) == ("", text)
+
+
+def test_matches_the_non_streaming_split():
+    thinking, answer = extract_think_content(TEXT)
+    assert parse([TEXT[i:i + 3] for i in range(0, len(TEXT), 3)]) == (thinking, answer)
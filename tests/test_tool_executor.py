@@ -0,0 +1,77 @@
+"""Ordering and locking of tool calls that touch the same file"""
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_tool_use import GroqDeepseek, MockGroq, NullRenderer
+
+
+def new_chat(**kwargs) -> GroqDeepseek:
+    return GroqDeepseek(client=MockGroq([{}]), renderer=NullRenderer(), **kwargs)
+
+
+def test_concurrent_batches_do_not_lose_writes(tmp_path):
+    # Two sessions' batches on one instance, each adding a column to the same file
+    path = str(tmp_path / "data.csv")
+    rows = 20_000
+    with open(path, "w") as file:
+        file.write("a\n" + "".join(f"{i}\n" for i in range(rows)))
+    chat = new_chat()
+
+    def add_column(name: str):
+        chat.run_tools([{"id": name, "name": "add_columns_csv",
+                         "args": {"file_path": path, "new_columns": {name: ["x"] * rows}}}])
+
+    threads = [threading.Thread(target=add_column, args=(name,)) for name in "bc"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    chat.close()
+    with open(path) as file:
+        assert sorted(file.readline().strip().split(",")) == ["a", "b", "c"]
+
+
+def test_plan_chains_calls_on_the_same_file_under_different_spellings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    chat = new_chat()
+    calls = [
+        {"id": "1", "name": "append_csv", "args": {"file_path": "a.csv", "data": [["1"]]}},
+        {"id": "2", "name": "read_csv", "args": {"file_path": "./a.csv"}},
+        {"id": "3", "name": "update_csv", "args": {"file_path": str(tmp_path / "a.csv"), "row_index": 0,
+                                                   "column_name": "x", "new_value": "2"}},
+        {"id": "4", "name": "read_csv", "args": {"file_path": "b.csv"}},
+    ]
+    chains = chat.tool_executor.plan(calls)
+    chat.close()
+    assert [[call["id"] for call in chain] for chain in chains] == [["1", "2", "3"], ["4"]]
+
+
+def test_lazy_writes_reach_the_file_at_the_end_of_the_turn(tmp_path):
+    path = str(tmp_path / "data.csv")
+    with open(path, "w") as file:
+        file.write("a\n1\n2\n")
+    # Reading first caches the frame, which the later edits then change in memory
+    edits = [
+        {"id": "1", "name": "read_csv", "arguments": json.dumps({"file_path": path})},
+        {"id": "2", "name": "add_columns_csv",
+         "arguments": json.dumps({"file_path": path, "new_columns": {"b": ["x", "y"]}})},
+        {"id": "3", "name": "update_csv",
+         "arguments": json.dumps({"file_path": path, "row_index": 0, "column_name": "a", "new_value": "5"})},
+    ]
+    chat = GroqDeepseek(client=MockGroq([{"tool_calls": edits}, {"content": "done"}]),
+                        renderer=NullRenderer(), stream=False, lazy_writes=True)
+    on_disk = []
+    run_tools = chat.run_tools
+    chat.run_tools = lambda calls: (run_tools(calls), on_disk.append(open(path).read()))[0]
+
+    assert chat.chat("edit data.csv") == "done"
+    # Still the original file after the edits ran, written once the turn ended
+    assert on_disk == ["a\n1\n2\n"]
+    with open(path) as file:
+        assert file.read() == "a,b\n5,x\n2,y\n"
+    assert not chat.csv_cache.is_dirty(path)
+    chat.close()